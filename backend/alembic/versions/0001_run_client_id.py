@@ -0,0 +1,31 @@
+"""러닝 기록 멱등 키 (오프라인 일괄 업로드)
+
+기존 테이블은 Base.metadata.create_all로 만들어졌다고 가정합니다.
+새 DB를 create_all로 만든 경우에는 `alembic stamp head`로 표시만 하세요.
+
+Revision ID: 0001_run_client_id
+Revises:
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_run_client_id'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('runs') as batch_op:
+        batch_op.add_column(sa.Column('client_id', sa.String(), nullable=True))
+        batch_op.create_unique_constraint('uq_runs_user_client_id', ['user_id', 'client_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('runs') as batch_op:
+        batch_op.drop_constraint('uq_runs_user_client_id', type_='unique')
+        batch_op.drop_column('client_id')
@@ -0,0 +1,48 @@
+"""러닝 기록 후처리 이벤트 테이블
+
+Revision ID: 0002_run_events
+Revises: 0001_run_client_id
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_run_events'
+down_revision = '0001_run_client_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'run_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=True),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('unlocked_achievement_ids', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['run_id'], ['runs.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_run_events_id', 'run_events', ['id'])
+    op.create_index('ix_run_events_user_id', 'run_events', ['user_id'])
+    op.create_index('ix_run_events_run_id', 'run_events', ['run_id'])
+    op.create_index('ix_run_events_status', 'run_events', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_run_events_status', table_name='run_events')
+    op.drop_index('ix_run_events_run_id', table_name='run_events')
+    op.drop_index('ix_run_events_user_id', table_name='run_events')
+    op.drop_index('ix_run_events_id', table_name='run_events')
+    op.drop_table('run_events')
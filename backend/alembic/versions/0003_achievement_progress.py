@@ -0,0 +1,34 @@
+"""업적 판정용 사용자별 진행 상태 테이블
+
+Revision ID: 0003_achievement_progress
+Revises: 0002_run_events
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_achievement_progress'
+down_revision = '0002_run_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 기존 사용자는 다음 러닝 기록 때 전체 기록으로 한 번 채워집니다.
+    op.create_table(
+        'achievement_progress',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('last_run_id', sa.Integer(), nullable=True),
+        sa.Column('last_run_date', sa.Date(), nullable=True),
+        sa.Column('current_streak', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('achievement_progress')
@@ -0,0 +1,30 @@
+"""목표 반복/종료 컬럼 및 인덱스
+
+Revision ID: 0005_goal_expiry
+Revises: 0004_catalog_versions
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_goal_expiry'
+down_revision = '0004_catalog_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('goals', sa.Column('is_recurring', sa.Boolean(), nullable=True, server_default=sa.false()))
+    op.add_column('goals', sa.Column('is_expired', sa.Boolean(), nullable=True, server_default=sa.false()))
+    op.create_index('ix_goals_user_open', 'goals', ['user_id', 'is_expired', 'is_completed'])
+    op.create_index('ix_goals_expiry', 'goals', ['is_expired', 'end_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_goals_expiry', table_name='goals')
+    op.drop_index('ix_goals_user_open', table_name='goals')
+    op.drop_column('goals', 'is_expired')
+    op.drop_column('goals', 'is_recurring')
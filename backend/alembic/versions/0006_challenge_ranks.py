@@ -0,0 +1,39 @@
+"""챌린지 참가자 순위 인덱스 및 기존 순위 채우기
+
+Revision ID: 0006_challenge_ranks
+Revises: 0005_goal_expiry
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_challenge_ranks'
+down_revision = '0005_goal_expiry'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_challenge_participants_rank', 'challenge_participants', ['challenge_id', 'rank'])
+    # 지금까지 저장되지 않았던 순위를 한 번 계산해 둡니다.
+    op.execute(
+        """
+        UPDATE challenge_participants SET rank = (
+            SELECT ranked.new_rank FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY challenge_id
+                    ORDER BY current_value DESC, completed_at IS NULL, completed_at, id
+                ) AS new_rank
+                FROM challenge_participants
+            ) AS ranked
+            WHERE ranked.id = challenge_participants.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_challenge_participants_rank', table_name='challenge_participants')
@@ -0,0 +1,41 @@
+"""챌린지 종료/보관 컬럼, 인덱스 및 참가자 보관 테이블
+
+Revision ID: 0007_challenge_lifecycle
+Revises: 0006_challenge_ranks
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_challenge_lifecycle'
+down_revision = '0006_challenge_ranks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('challenges', sa.Column('archived_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_challenges_active_end', 'challenges', ['is_active', 'end_date'])
+    op.create_table(
+        'challenge_participants_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('challenge_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('current_value', sa.Float(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('rank', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['challenge_id'], ['challenges.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_challenge_participants_archive_challenge_id', 'challenge_participants_archive', ['challenge_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_challenge_participants_archive_challenge_id', table_name='challenge_participants_archive')
+    op.drop_table('challenge_participants_archive')
+    op.drop_index('ix_challenges_active_end', table_name='challenges')
+    op.drop_column('challenges', 'archived_at')
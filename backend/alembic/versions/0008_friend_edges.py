@@ -0,0 +1,56 @@
+"""친구 관계 방향별 행, 친구 수 컬럼 및 friendships 인덱스
+
+Revision ID: 0008_friend_edges
+Revises: 0007_challenge_lifecycle
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_friend_edges'
+down_revision = '0007_challenge_lifecycle'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('friend_count', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_friendships_pair', 'friendships', ['user_id', 'friend_id'])
+    op.create_index('ix_friendships_recipient', 'friendships', ['friend_id', 'status'])
+    op.create_table(
+        'friend_edges',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('friend_id', sa.Integer(), nullable=False),
+        sa.Column('friendship_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['friend_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['friendship_id'], ['friendships.id']),
+        sa.PrimaryKeyConstraint('user_id', 'friend_id')
+    )
+
+    # 기존 수락된 친구 관계로 방향별 행과 친구 수를 채웁니다.
+    op.execute(
+        """
+        INSERT INTO friend_edges (user_id, friend_id, friendship_id, created_at)
+        SELECT a, b, MIN(id), MIN(created_at) FROM (
+            SELECT user_id AS a, friend_id AS b, id, created_at FROM friendships WHERE status = 'accepted'
+            UNION ALL
+            SELECT friend_id AS a, user_id AS b, id, created_at FROM friendships WHERE status = 'accepted'
+        ) AS pairs
+        GROUP BY a, b
+        """
+    )
+    op.execute(
+        "UPDATE users SET friend_count = (SELECT COUNT(*) FROM friend_edges WHERE friend_edges.user_id = users.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('friend_edges')
+    op.drop_index('ix_friendships_recipient', table_name='friendships')
+    op.drop_index('ix_friendships_pair', table_name='friendships')
+    op.drop_column('users', 'friend_count')
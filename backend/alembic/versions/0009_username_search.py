@@ -0,0 +1,34 @@
+"""닉네임 검색 인덱스 (PostgreSQL pg_trgm)
+
+Revision ID: 0009_username_search
+Revises: 0008_friend_edges
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_username_search'
+down_revision = '0008_friend_edges'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SQLite 등에서는 services/user_search.py의 메모리 색인을 사용합니다.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # 부분 일치 (LIKE '%q%')
+    op.execute("CREATE INDEX ix_users_username_trgm ON users USING gin (lower(username) gin_trgm_ops)")
+    # 접두어 일치 (LIKE 'q%') - 로캘과 무관하게 사용되도록 text_pattern_ops
+    op.execute("CREATE INDEX ix_users_username_prefix ON users (lower(username) text_pattern_ops)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_users_username_prefix")
+    op.execute("DROP INDEX IF EXISTS ix_users_username_trgm")
@@ -0,0 +1,45 @@
+"""친구 활동 피드 타임라인 테이블 및 일괄 업로드 이벤트의 기록 목록
+
+Revision ID: 0010_friend_feed
+Revises: 0009_username_search
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_friend_feed'
+down_revision = '0009_username_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('run_events', sa.Column('run_ids', sa.JSON(), nullable=True))
+    op.create_table(
+        'feed_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('distance', sa.Float(), nullable=False),
+        sa.Column('duration', sa.Integer(), nullable=False),
+        sa.Column('pace', sa.Float(), nullable=False),
+        sa.Column('run_date', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['run_id'], ['runs.id']),
+        sa.ForeignKeyConstraint(['author_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('owner_id', 'run_id', name='uq_feed_entries_owner_run')
+    )
+    op.create_index('ix_feed_entries_timeline', 'feed_entries', ['owner_id', 'run_date', 'id'])
+    # 기존 기록은 backfill_feed.py로 채웁니다.
+
+
+def downgrade() -> None:
+    op.drop_index('ix_feed_entries_timeline', table_name='feed_entries')
+    op.drop_table('feed_entries')
+    op.drop_column('run_events', 'run_ids')
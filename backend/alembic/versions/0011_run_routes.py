@@ -0,0 +1,95 @@
+"""러닝 경로를 run_routes 테이블에 압축 형식으로 이전
+
+Revision ID: 0011_run_routes
+Revises: 0010_friend_feed
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from services.route_codec import encode_route, decode_route
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_run_routes'
+down_revision = '0010_friend_feed'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+runs = sa.table(
+    'runs',
+    sa.column('id', sa.Integer()),
+    sa.column('route', sa.JSON()),
+)
+run_routes = sa.table(
+    'run_routes',
+    sa.column('run_id', sa.Integer()),
+    sa.column('encoding', sa.String()),
+    sa.column('point_count', sa.Integer()),
+    sa.column('data', sa.LargeBinary()),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'run_routes',
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('encoding', sa.String(), nullable=False),
+        sa.Column('point_count', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['run_id'], ['runs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('run_id')
+    )
+
+    # 기존 경로를 id 순서로 나눠 변환합니다.
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(runs.c.id, runs.c.route)
+            .where(runs.c.id > last_id, runs.c.route.isnot(None))
+            .order_by(runs.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        rows = []
+        for run_id, route in batch:
+            # JSON null로 저장된 값도 경로 없음으로 취급합니다.
+            if route is None:
+                continue
+            encoding, point_count, data = encode_route(route)
+            rows.append({'run_id': run_id, 'encoding': encoding, 'point_count': point_count, 'data': data})
+        if rows:
+            bind.execute(run_routes.insert(), rows)
+        last_id = batch[-1].id
+
+    with op.batch_alter_table('runs') as batch_op:
+        batch_op.drop_column('route')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('runs') as batch_op:
+        batch_op.add_column(sa.Column('route', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(run_routes.c.run_id, run_routes.c.encoding, run_routes.c.data)
+            .where(run_routes.c.run_id > last_id)
+            .order_by(run_routes.c.run_id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        bind.execute(
+            runs.update().where(runs.c.id == sa.bindparam('run_id')).values(route=sa.bindparam('b_route')),
+            [{'run_id': row.run_id, 'b_route': decode_route(row.encoding, row.data)} for row in batch]
+        )
+        last_id = batch[-1].run_id
+
+    op.drop_table('run_routes')
@@ -0,0 +1,26 @@
+"""업적 판정 진행 상태에 마지막으로 반영한 업적 목록 버전 추가
+
+Revision ID: 0012_achievement_catalog_version
+Revises: 0011_run_routes
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012_achievement_catalog_version'
+down_revision = '0011_run_routes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 기존 사용자는 NULL이므로 다음 러닝 기록 때 모든 유형을 한 번 다시 확인합니다.
+    op.add_column('achievement_progress', sa.Column('catalog_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('achievement_progress') as batch_op:
+        batch_op.drop_column('catalog_version')
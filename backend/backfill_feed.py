@@ -0,0 +1,23 @@
+"""
+친구 활동 피드 채우기
+
+피드 기능 이전의 러닝 기록을 친구들의 타임라인에 넣습니다.
+이미 있는 항목은 건너뛰므로 여러 번 실행해도 안전합니다.
+"""
+import sys
+
+from database import SessionLocal
+from services.feed import backfill_feeds
+
+
+def main(batch_size: int = 500):
+    db = SessionLocal()
+    try:
+        processed = backfill_feeds(db, batch_size=batch_size)
+        print(f"✅ {processed}명의 피드를 채웠습니다.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
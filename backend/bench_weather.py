@@ -0,0 +1,95 @@
+"""
+WeatherService 부하 시험 (mock_kma_server.py 대상)
+
+먼저 대역 서버를 띄운 뒤 실행합니다.
+    python mock_kma_server.py --port 8090 --latency 200
+    python bench_weather.py --mock-url http://127.0.0.1:8090 --requests 2000 --cells 200
+
+단계:
+    cold   - 캐시가 빈 상태에서 동시 요청 (upstream 호출 + 동일 격자 요청 합치기)
+    warm   - 같은 요청 반복 (캐시 적중)
+    outage - 대역 서버 오류율 100% + 다음 발표분으로 넘어간 상황 (서킷 브레이커 + 지난 예보)
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import time
+from datetime import timedelta
+
+import httpx
+
+from services.weather_service import WeatherService
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * p / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+async def run_phase(name, service, points, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    stale = 0
+
+    async def one(lat, lon):
+        nonlocal stale
+        async with semaphore:
+            started = time.perf_counter()
+            result = await service.get_weather(lat, lon)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if result['is_stale']:
+                stale += 1
+
+    started = time.perf_counter()
+    # WeatherService의 요청별 로그는 결과 출력에서 제외합니다.
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(one(lat, lon) for lat, lon in points))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{name:<7} n={len(points):<6} {len(points) / elapsed:8.0f} req/s  "
+        f"p50={percentile(latencies, 50):7.1f}ms  p95={percentile(latencies, 95):7.1f}ms  "
+        f"p99={percentile(latencies, 99):7.1f}ms  max={latencies[-1]:7.1f}ms  "
+        f"stale={stale}  circuit={service._breaker.state}"
+    )
+
+async def main(args):
+    mock_url = args.mock_url.rstrip("/")
+    service = WeatherService()
+    service.base_url = f"{mock_url}/1360000/VilageFcstInfoService_2.0"
+
+    rng = random.Random(args.seed)
+    # 남한 영역에서 격자 후보 좌표를 뽑고, 요청은 그 중에서 고릅니다.
+    cells = [(rng.uniform(34.5, 38.0), rng.uniform(126.5, 129.3)) for _ in range(args.cells)]
+    points = [rng.choice(cells) for _ in range(args.requests)]
+
+    async with httpx.AsyncClient() as admin:
+        await admin.post(f"{mock_url}/_config", json={"latency_ms": args.latency, "error_rate": 0.0, "malformed_rate": args.malformed_rate})
+
+        await run_phase("cold", service, points, args.concurrency)
+        await run_phase("warm", service, points, args.concurrency)
+
+        # 다음 발표분으로 넘어갔는데 기상청이 응답하지 않는 상황
+        await admin.post(f"{mock_url}/_config", json={"latency_ms": args.latency, "error_rate": 1.0})
+        get_base_datetime = service._get_base_datetime
+        service._get_base_datetime = lambda now: get_base_datetime(now + timedelta(hours=3))
+        await run_phase("outage", service, points, args.concurrency)
+
+        stats = (await admin.get(f"{mock_url}/_config")).json()["stats"]
+        print(f"upstream requests: {stats}")
+
+    await service.aclose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WeatherService load test against mock_kma_server.py")
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8090")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--cells", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=200.0, help="대역 서버 평균 지연(ms)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
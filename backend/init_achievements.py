@@ -4,6 +4,7 @@
 from sqlalchemy.orm import Session
 from database import engine, SessionLocal
 import models
+from services.achievement_catalog import bump_catalog_version
 
 # 데이터베이스 테이블 생성
 models.Base.metadata.create_all(bind=engine)
@@ -99,6 +100,9 @@ def init_achievements():
             db.add(achievement)
             count += 1
     
+    if count > 0:
+        # 서버의 업적 목록 캐시가 새 목록을 읽도록 버전을 올립니다.
+        bump_catalog_version(db)
     db.commit()
     print(f"{count}개의 새로운 업적이 생성되었습니다.")
     
@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -6,16 +8,49 @@ from pathlib import Path
 
 # 기능별로 분리된 라우터들을 임포트합니다.
 from routers import auth, profiles, runs, extra, friends, goals, achievements, challenges
+from services.weather_service import weather_service
+from services.weather_prefetch import weather_prefetcher, PREFETCH_ENABLED
+from services.run_events import run_event_pipeline
+from services.goal_scheduler import goal_scheduler, GOAL_SCHEDULER_ENABLED
+from services.challenge_scheduler import challenge_scheduler, CHALLENGE_SCHEDULER_ENABLED
+from services.kma_grid import grid_lookup, GRID_LOOKUP_ENABLED
 
 # 데이터베이스 테이블 생성은 이제 Alembic이 관리하므로 이 코드는 필요 없습니다.
 # import models
 # from database import engine
 # models.Base.metadata.create_all(bind=engine)
 
+# --- 앱 수명 주기 --- #
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 러닝 기록 후처리(업적/챌린지) 워커
+    run_event_pipeline.start()
+    # 기간이 끝난 목표 종료 / 반복 목표 다음 기간 생성
+    if GOAL_SCHEDULER_ENABLED:
+        goal_scheduler.start()
+    # 종료된 챌린지 마감 / 오래된 참가자 행 보관
+    if CHALLENGE_SCHEDULER_ENABLED:
+        challenge_scheduler.start()
+    # 위경도 -> 격자 조회 래스터는 요청 처리 전에 스레드에서 만듭니다.
+    if GRID_LOOKUP_ENABLED:
+        await asyncio.to_thread(grid_lookup.build)
+    # 예보 발표 직후 자주 요청되는 격자의 날씨를 미리 받아둡니다.
+    if PREFETCH_ENABLED:
+        weather_prefetcher.start()
+    yield
+    await run_event_pipeline.stop()
+    await goal_scheduler.stop()
+    await challenge_scheduler.stop()
+    await weather_prefetcher.stop()
+    # 종료 시 기상청 API 연결 풀을 정리합니다.
+    await weather_service.aclose()
+
 app = FastAPI(
     title="뛰어 (Twieo) API",
     version="1.0.0",
-    description="러닝 앱 '뛰어'의 백엔드 API입니다."
+    description="러닝 앱 '뛰어'의 백엔드 API입니다.",
+    lifespan=lifespan
 )
 
 # --- 미들웨어 설정: CORS --- #
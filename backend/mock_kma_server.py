@@ -0,0 +1,213 @@
+"""
+기상청 단기예보 API(getVilageFcst) 로컬 대역 서버
+
+실제 apis.data.go.kr 대신 임의의 격자/발표 시각에 대해 그럴듯한 예보 응답을
+돌려줍니다. 지연, 오류율, 잘못된 응답 비율을 설정할 수 있어 WeatherService의
+캐시와 서킷 브레이커를 오프라인에서 반복 가능하게 시험할 수 있습니다.
+
+실행:
+    python mock_kma_server.py --port 8090 --latency 200 --error-rate 0.1
+    WEATHER_API_BASE_URL=http://localhost:8090/1360000/VilageFcstInfoService_2.0 uvicorn main:app
+
+실행 중 설정 변경:
+    curl -X POST localhost:8090/_config -H 'Content-Type: application/json' -d '{"error_rate": 1.0}'
+"""
+import argparse
+import asyncio
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel
+
+BASE_TIMES = ["0200", "0500", "0800", "1100", "1400", "1700", "2000", "2300"]
+FORECAST_DAYS = 3  # 발표일 포함 3일치 예보
+
+class MockConfig(BaseModel):
+    latency_ms: float = 50.0  # 평균 응답 지연
+    latency_jitter_ms: float = 20.0  # 지연 표준편차
+    error_rate: float = 0.0  # HTTP 5xx 응답 비율
+    malformed_rate: float = 0.0  # 잘못된 응답(잘린 JSON, XML 오류, NO_DATA) 비율
+    seed: Optional[int] = None
+
+config = MockConfig()
+rng = random.Random()
+stats = {"requests": 0, "errors": 0, "malformed": 0}
+
+app = FastAPI(title="KMA getVilageFcst mock")
+
+@app.get("/_config")
+def get_config():
+    return {"config": config, "stats": stats}
+
+@app.post("/_config")
+def update_config(update: MockConfig):
+    """실행 중 지연/오류율 변경 (장애 상황 재현용)"""
+    global config
+    config = update
+    if config.seed is not None:
+        rng.seed(config.seed)
+    return {"config": config}
+
+@app.get("/1360000/VilageFcstInfoService_2.0/getVilageFcst")
+async def get_vilage_fcst(
+    base_date: str,
+    base_time: str,
+    nx: int,
+    ny: int,
+    serviceKey: str = "",
+    pageNo: int = Query(1, ge=1),
+    numOfRows: int = Query(10, ge=1),
+    dataType: str = "XML"
+):
+    stats["requests"] += 1
+
+    delay = max(rng.gauss(config.latency_ms, config.latency_jitter_ms), 0) / 1000
+    await asyncio.sleep(delay)
+
+    if rng.random() < config.error_rate:
+        stats["errors"] += 1
+        return PlainTextResponse("Service Unavailable", status_code=rng.choice([500, 502, 503]))
+
+    if rng.random() < config.malformed_rate:
+        stats["malformed"] += 1
+        return _malformed_response()
+
+    try:
+        published_at = datetime.strptime(base_date + base_time, "%Y%m%d%H%M")
+    except ValueError:
+        published_at = None
+    if published_at is None or base_time not in BASE_TIMES:
+        return _result(header_code="10", header_msg="INVALID_REQUEST_PARAMETER_ERROR")
+
+    items = _forecast_items(published_at, base_date, base_time, nx, ny)
+    start = (pageNo - 1) * numOfRows
+    page = items[start:start + numOfRows]
+    if not page:
+        return _result(header_code="03", header_msg="NO_DATA")
+
+    return _result(body={
+        "dataType": "JSON",
+        "items": {"item": page},
+        "pageNo": pageNo,
+        "numOfRows": numOfRows,
+        "totalCount": len(items)
+    })
+
+def _result(header_code: str = "00", header_msg: str = "NORMAL_SERVICE", body: dict = None):
+    response = {"header": {"resultCode": header_code, "resultMsg": header_msg}}
+    if body is not None:
+        response["body"] = body
+    return JSONResponse({"response": response})
+
+def _malformed_response():
+    """실제 API에서 관찰되는 비정상 응답 중 하나"""
+    kind = rng.choice(["truncated", "xml", "nodata"])
+    if kind == "truncated":
+        return Response('{"response":{"header":{"resultCode":"00","resultMsg":"NORMAL_SERVICE"},"body":{"items":{"item":[{"cat',
+                        media_type="application/json")
+    if kind == "xml":
+        return Response(
+            "<OpenAPI_ServiceResponse><cmmMsgHeader><errMsg>SERVICE ERROR</errMsg>"
+            "<returnAuthMsg>SERVICE_KEY_IS_NOT_REGISTERED_ERROR</returnAuthMsg>"
+            "<returnReasonCode>30</returnReasonCode></cmmMsgHeader></OpenAPI_ServiceResponse>",
+            media_type="text/xml"
+        )
+    return _result(header_code="03", header_msg="NO_DATA")
+
+def _forecast_items(published_at: datetime, base_date: str, base_time: str, nx: int, ny: int):
+    """
+    발표 시각 다음 시간부터 FORECAST_DAYS일 끝까지의 시간별 예보 항목
+
+    같은 격자/예보 시각에는 발표분과 관계없이 같은 값을 돌려줍니다.
+    """
+    items = []
+    end = datetime.combine(published_at.date() + timedelta(days=FORECAST_DAYS - 1), datetime.min.time()) + timedelta(hours=23)
+    fcst_at = published_at + timedelta(hours=1)
+
+    while fcst_at <= end:
+        fcst_date = fcst_at.strftime("%Y%m%d")
+        fcst_time = fcst_at.strftime("%H%M")
+        values = _hourly_values(nx, ny, fcst_at)
+        if fcst_at.hour == 6:
+            values["TMN"] = f"{float(values['TMP']) - 3:.1f}"
+        if fcst_at.hour == 15:
+            values["TMX"] = f"{float(values['TMP']) + 1:.1f}"
+
+        for category, value in values.items():
+            items.append({
+                "baseDate": base_date,
+                "baseTime": base_time,
+                "category": category,
+                "fcstDate": fcst_date,
+                "fcstTime": fcst_time,
+                "fcstValue": value,
+                "nx": nx,
+                "ny": ny
+            })
+        fcst_at += timedelta(hours=1)
+
+    return items
+
+def _hourly_values(nx: int, ny: int, fcst_at: datetime):
+    cell_rng = random.Random(f"{nx}:{ny}:{fcst_at:%Y%m%d%H}")
+
+    # 위도(ny)가 높을수록, 겨울일수록 춥고 15시 전후로 가장 따뜻합니다.
+    seasonal = 13 - 12 * math.cos((fcst_at.timetuple().tm_yday - 15) / 365 * 2 * math.pi)
+    diurnal = 5 * math.cos((fcst_at.hour - 15) / 24 * 2 * math.pi)
+    temperature = seasonal + diurnal - (ny - 127) * 0.05 + cell_rng.uniform(-1.5, 1.5)
+
+    sky = cell_rng.choices([1, 3, 4], weights=[5, 3, 2])[0]
+    pop = {1: 0, 3: 20, 4: 60}[sky] + cell_rng.choice([0, 0, 10])
+    raining = sky == 4 and cell_rng.random() < pop / 100
+    pty = (3 if temperature < 0 else 1) if raining else 0
+    if raining:
+        precipitation = cell_rng.choice(["1mm 미만", "1.0mm", "2.0mm", "5.0mm", "30.0~50.0mm"])
+    else:
+        precipitation = "강수없음"
+
+    wind_speed = abs(cell_rng.gauss(2.5, 1.5))
+    wind_dir = cell_rng.randrange(0, 360)
+
+    return {
+        "TMP": f"{round(temperature)}",
+        "UUU": f"{-wind_speed * math.sin(math.radians(wind_dir)):.1f}",
+        "VVV": f"{-wind_speed * math.cos(math.radians(wind_dir)):.1f}",
+        "VEC": f"{wind_dir}",
+        "WSD": f"{wind_speed:.1f}",
+        "SKY": f"{sky}",
+        "PTY": f"{pty}",
+        "POP": f"{pop}",
+        "WAV": "0",
+        "PCP": precipitation,
+        "REH": f"{cell_rng.randrange(35, 95, 5)}",
+        "SNO": "적설없음"
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="KMA getVilageFcst mock server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=50.0, help="평균 지연(ms)")
+    parser.add_argument("--jitter", type=float, default=20.0, help="지연 표준편차(ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 5xx 비율 (0~1)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="잘못된 응답 비율 (0~1)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency,
+        latency_jitter_ms=args.jitter,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed
+    )
+    if args.seed is not None:
+        rng.seed(args.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, JSON, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
+from services.route_codec import encode_route, decode_route
 
 class User(Base):
     __tablename__ = "users"
@@ -12,6 +13,7 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
+    friend_count = Column(Integer, nullable=False, default=0)  # 수락된 친구 수 (friend_edges와 함께 갱신)
     
     # Relationships
     runs = relationship("Run", back_populates="user")
@@ -69,10 +71,76 @@ class Run(Base):
     duration = Column(Integer, nullable=False)  # seconds
     pace = Column(Float, nullable=False)  # min/km
     calories = Column(Integer, nullable=False)
-    route = Column(JSON, nullable=True)  # GPS coordinates
     weather = Column(String, nullable=True)
+    client_id = Column(String, nullable=True)  # 오프라인 동기화용 멱등 키 (클라이언트가 생성)
     
     user = relationship("User", back_populates="runs")
+    # GPS 경로는 run_routes에 압축해서 따로 저장하고, route에 접근할 때만 읽습니다.
+    route_data = relationship("RunRoute", uselist=False, cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "client_id", name="uq_runs_user_client_id"),
+    )
+    
+    @property
+    def route(self):
+        """GPS 경로 ([{"latitude": .., "longitude": ..}, ...], 없으면 None)"""
+        if self.route_data is None:
+            return None
+        return decode_route(self.route_data.encoding, self.route_data.data)
+    
+    @route.setter
+    def route(self, points):
+        if points is None:
+            self.route_data = None
+            return
+        encoding, point_count, data = encode_route(points)
+        self.route_data = RunRoute(encoding=encoding, point_count=point_count, data=data)
+
+# 러닝 기록의 GPS 경로 (services/route_codec.py 형식으로 압축)
+class RunRoute(Base):
+    __tablename__ = "run_routes"
+    
+    run_id = Column(Integer, ForeignKey("runs.id", ondelete="CASCADE"), primary_key=True)
+    encoding = Column(String, nullable=False)  # delta-v1, json-zlib
+    point_count = Column(Integer, nullable=False, default=0)
+    data = Column(LargeBinary, nullable=False)
+
+# 러닝 기록 후처리 이벤트 (업적/챌린지 갱신)
+class RunEvent(Base):
+    __tablename__ = "run_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    run_id = Column(Integer, ForeignKey("runs.id"), nullable=True, index=True)  # 일괄 업로드는 마지막 기록
+    run_ids = Column(JSON, nullable=True)  # 일괄 업로드로 새로 저장된 기록 전체
+    event_type = Column(String, nullable=False, default="run_recorded")  # run_recorded, runs_imported
+    status = Column(String, nullable=False, default="pending", index=True)  # pending, processing, done, failed
+    attempts = Column(Integer, default=0)
+    unlocked_achievement_ids = Column(JSON, nullable=True)  # 처리 결과 새로 달성한 업적
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
+
+# 친구 활동 피드 타임라인 항목 (기록 저장 시 친구마다 한 행씩 복사)
+class FeedEntry(Base):
+    __tablename__ = "feed_entries"
+    
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # 타임라인 주인
+    run_id = Column(Integer, ForeignKey("runs.id"), nullable=False)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # 기록한 친구
+    distance = Column(Float, nullable=False)
+    duration = Column(Integer, nullable=False)
+    pace = Column(Float, nullable=False)
+    run_date = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("owner_id", "run_id", name="uq_feed_entries_owner_run"),
+        Index("ix_feed_entries_timeline", "owner_id", "run_date", "id"),
+    )
 
 class IndoorFacility(Base):
     __tablename__ = "indoor_facilities"
@@ -96,9 +164,23 @@ class Friendship(Base):
     status = Column(String, default="pending")  # pending, accepted, rejected
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index("ix_friendships_pair", "user_id", "friend_id"),
+        Index("ix_friendships_recipient", "friend_id", "status"),
+    )
+    
     user = relationship("User", foreign_keys=[user_id], back_populates="sent_friend_requests")
     friend = relationship("User", foreign_keys=[friend_id], back_populates="received_friend_requests")
 
+# 수락된 친구 관계의 방향별 행 (친구 한 쌍마다 (a, b)와 (b, a) 두 행)
+class FriendEdge(Base):
+    __tablename__ = "friend_edges"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    friend_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    friendship_id = Column(Integer, ForeignKey("friendships.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 # 목표
 class Goal(Base):
     __tablename__ = "goals"
@@ -112,6 +194,13 @@ class Goal(Base):
     start_date = Column(DateTime, default=datetime.utcnow)
     end_date = Column(DateTime, nullable=True)
     is_completed = Column(Boolean, default=False)
+    is_recurring = Column(Boolean, default=False)  # 기간이 끝나면 다음 기간 목표를 자동 생성
+    is_expired = Column(Boolean, default=False)  # 기간 종료 (스케줄러가 설정)
+    
+    __table_args__ = (
+        Index("ix_goals_user_open", "user_id", "is_expired", "is_completed"),
+        Index("ix_goals_expiry", "is_expired", "end_date"),
+    )
     
     user = relationship("User", back_populates="goals")
 
@@ -139,6 +228,25 @@ class UserAchievement(Base):
     user = relationship("User", back_populates="achievements")
     achievement = relationship("Achievement")
 
+# 캐시하는 목록(업적 등)의 버전 - 목록을 바꿀 때 올립니다
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+    
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# 업적 판정용 사용자별 진행 상태 (누적 거리/횟수/최장 거리/최고 페이스는 UserProfile)
+class AchievementProgress(Base):
+    __tablename__ = "achievement_progress"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_run_id = Column(Integer, default=0)  # 마지막으로 반영한 러닝 기록 id
+    last_run_date = Column(Date, nullable=True)
+    current_streak = Column(Integer, default=0)  # last_run_date까지의 연속 러닝 일수
+    catalog_version = Column(Integer, nullable=True)  # 마지막으로 전체 판정한 업적 목록 버전
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # 챌린지 (친구와 뛰어)
 class Challenge(Base):
     __tablename__ = "challenges"
@@ -150,7 +258,12 @@ class Challenge(Base):
     target_value = Column(Float, nullable=False)
     start_date = Column(DateTime, default=datetime.utcnow)
     end_date = Column(DateTime, nullable=False)
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True)  # 종료되면 스케줄러가 False로 바꾸고 순위를 확정
+    archived_at = Column(DateTime, nullable=True)  # 참가자 행을 보관 테이블로 옮긴 시각
+    
+    __table_args__ = (
+        Index("ix_challenges_active_end", "is_active", "end_date"),
+    )
     
     creator = relationship("User", foreign_keys=[creator_id], back_populates="challenges_created")
     participants = relationship("ChallengeParticipant", back_populates="challenge", cascade="all, delete-orphan")
@@ -164,7 +277,22 @@ class ChallengeParticipant(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     current_value = Column(Float, default=0.0)
     completed_at = Column(DateTime, nullable=True)
-    rank = Column(Integer, nullable=True)
+    rank = Column(Integer, nullable=True)  # 진행도가 바뀔 때마다 갱신되는 순위
+    
+    __table_args__ = (
+        Index("ix_challenge_participants_rank", "challenge_id", "rank"),
+    )
     
     challenge = relationship("Challenge", back_populates="participants")
     user = relationship("User", back_populates="challenge_participants")
+
+# 오래전에 끝난 챌린지의 참가자 (최종 순위 보관용, 구조는 challenge_participants와 동일)
+class ChallengeParticipantArchive(Base):
+    __tablename__ = "challenge_participants_archive"
+    
+    id = Column(Integer, primary_key=True)
+    challenge_id = Column(Integer, ForeignKey("challenges.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    current_value = Column(Float, default=0.0)
+    completed_at = Column(DateTime, nullable=True)
+    rank = Column(Integer, nullable=True)
@@ -0,0 +1,23 @@
+"""
+프로필 누적 통계 재계산
+
+runs 테이블을 기준으로 모든 사용자의 총 거리, 러닝 횟수, 최장 거리,
+최고 페이스, 레벨을 다시 계산합니다. 값이 어긋났을 때 실행하세요.
+"""
+import sys
+
+from database import SessionLocal
+from routers.profiles import rebuild_profile_stats
+
+
+def main(batch_size: int = 500):
+    db = SessionLocal()
+    try:
+        updated = rebuild_profile_stats(db, batch_size=batch_size)
+        print(f"✅ {updated}개 프로필 통계를 다시 계산했습니다.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
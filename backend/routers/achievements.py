@@ -9,6 +9,7 @@ import models
 import schemas
 from database import get_db
 from auth import oauth2_scheme, decode_token
+from services.achievement_catalog import achievement_catalog
 
 router = APIRouter(prefix="/api/achievements", tags=["achievements"])
 
@@ -26,114 +27,160 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 @router.get("/")
 def get_achievements(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """모든 업적 및 달성 여부"""
-    all_achievements = db.query(models.Achievement).all()
-    user_achievements = db.query(models.UserAchievement).filter(
-        models.UserAchievement.user_id == current_user.id
-    ).all()
+    # 달성 시각만 한 번에 읽고 업적 정보는 캐시에서 가져옵니다.
+    unlocked_at = _unlocked_at_by_id(current_user.id, db)
     
-    unlocked_ids = {ua.achievement_id for ua in user_achievements}
-    
-    results = []
-    for achievement in all_achievements:
-        results.append({
+    return [
+        {
             "id": achievement.id,
             "name": achievement.name,
             "description": achievement.description,
             "icon": achievement.icon,
             "color": achievement.color,
-            "unlocked": achievement.id in unlocked_ids,
-            "unlocked_at": next((ua.unlocked_at for ua in user_achievements if ua.achievement_id == achievement.id), None)
-        })
-    
-    return results
+            "unlocked": achievement.id in unlocked_at,
+            "unlocked_at": unlocked_at.get(achievement.id)
+        }
+        for achievement in achievement_catalog.all(db)
+    ]
 
 @router.get("/unlocked")
 def get_unlocked_achievements(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """달성한 업적 목록"""
-    user_achievements = db.query(models.UserAchievement).filter(
-        models.UserAchievement.user_id == current_user.id
-    ).all()
-    
-    results = []
-    for ua in user_achievements:
-        achievement = db.query(models.Achievement).filter(models.Achievement.id == ua.achievement_id).first()
-        if achievement:
-            results.append({
-                "id": achievement.id,
-                "name": achievement.name,
-                "description": achievement.description,
-                "icon": achievement.icon,
-                "color": achievement.color,
-                "unlocked_at": ua.unlocked_at
-            })
-    
-    return results
+    unlocked_at = _unlocked_at_by_id(current_user.id, db)
+    
+    return [
+        {
+            "id": achievement.id,
+            "name": achievement.name,
+            "description": achievement.description,
+            "icon": achievement.icon,
+            "color": achievement.color,
+            "unlocked_at": unlocked_at[achievement.id]
+        }
+        for achievement in achievement_catalog.by_ids(db, unlocked_at)
+    ]
+
+def _unlocked_at_by_id(user_id: int, db: Session):
+    """
+    사용자가 달성한 업적 id -> 달성 시각 (ORM 객체 없이 한 번의 쿼리)
+    """
+    rows = db.query(models.UserAchievement.achievement_id, models.UserAchievement.unlocked_at).filter(
+        models.UserAchievement.user_id == user_id
+    ).order_by(models.UserAchievement.id)
+    return {achievement_id: unlocked_at for achievement_id, unlocked_at in rows}
 
 def check_and_unlock_achievements(user_id: int, db: Session):
-    """업적 달성 확인 및 잠금 해제 (러닝 기록 후 호출)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    """
+    업적 달성 확인 및 잠금 해제 (러닝 기록 후 호출)
+    
+    전체 기록 대신 마지막으로 반영한 기록 이후의 새 기록과 사용자별 진행 상태
+    (AchievementProgress, UserProfile 누적 통계)만 사용합니다. 새 기록으로 값이
+    바뀔 수 있는 requirement_type만 확인하며, 업적 목록 캐시의 유형별 정렬된
+    기준값에서 이분 탐색으로 달성한 업적을 찾습니다.
+    처음 호출되는 사용자는 전체 기록으로 진행 상태를 한 번 채웁니다.
+    업적 목록이 바뀐 뒤 처음 호출되면 새 업적을 위해 모든 유형을 다시 확인합니다.
+    
+    커밋은 호출한 쪽에서 합니다 (후처리 이벤트 완료와 같은 트랜잭션).
+    """
     profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == user_id).first()
-    runs = db.query(models.Run).filter(models.Run.user_id == user_id).all()
+    if not profile:
+        return []
     
-    if not profile or not runs:
+    progress = db.get(models.AchievementProgress, user_id)
+    if progress is None:
+        progress = models.AchievementProgress(user_id=user_id, last_run_id=0, current_streak=0)
+        db.add(progress)
+    
+    new_runs = db.query(models.Run.id, models.Run.distance, models.Run.pace, models.Run.date).filter(
+        models.Run.user_id == user_id,
+        models.Run.id > progress.last_run_id
+    ).order_by(models.Run.id).all()
+    catalog_version = achievement_catalog.version(db)
+    catalog_changed = progress.catalog_version != catalog_version
+    if not new_runs and not catalog_changed:
         return []
     
-    # 이미 달성한 업적
-    unlocked = db.query(models.UserAchievement).filter(
-        models.UserAchievement.user_id == user_id
-    ).all()
-    unlocked_ids = {ua.achievement_id for ua in unlocked}
+    changed = {}
+    if new_runs:
+        # 새 기록으로 값이 바뀔 수 있는 유형과 현재 값 (처음이면 모든 유형)
+        bootstrap = progress.last_run_id == 0
+        changed["runs"] = profile.total_runs
+        if bootstrap or any(run.distance > 0 for run in new_runs):
+            changed["total_distance"] = profile.total_distance
+        if bootstrap or max(run.distance for run in new_runs) >= profile.longest_run:
+            changed["distance"] = profile.longest_run
+        if bootstrap or min((run.pace for run in new_runs if run.pace > 0), default=0) == profile.best_pace:
+            changed["pace"] = profile.best_pace
+        previous_streak = progress.current_streak
+        _advance_streak(progress, [run.date.date() for run in new_runs], user_id, db)
+        if bootstrap or progress.current_streak != previous_streak:
+            changed["streak"] = progress.current_streak
+        progress.last_run_id = new_runs[-1].id
     
-    # 모든 업적
-    achievements = db.query(models.Achievement).all()
-    newly_unlocked = []
+    if catalog_changed:
+        # 업적이 추가/수정됐으면 이미 기준을 넘은 사용자도 달성하도록 모든 유형을 확인합니다.
+        changed = {
+            "runs": profile.total_runs,
+            "total_distance": profile.total_distance,
+            "distance": profile.longest_run,
+            "pace": profile.best_pace,
+            "streak": progress.current_streak or 0
+        }
+        progress.catalog_version = catalog_version
     
-    for achievement in achievements:
-        if achievement.id in unlocked_ids:
-            continue
-        
-        unlocked = False
-        
-        if achievement.requirement_type == "runs":
-            if profile.total_runs >= achievement.requirement_value:
-                unlocked = True
-        
-        elif achievement.requirement_type == "distance":
-            max_distance = max((run.distance for run in runs), default=0)
-            if max_distance >= achievement.requirement_value:
-                unlocked = True
-        
-        elif achievement.requirement_type == "total_distance":
-            if profile.total_distance >= achievement.requirement_value:
-                unlocked = True
-        
-        elif achievement.requirement_type == "pace":
-            if profile.best_pace > 0 and profile.best_pace <= achievement.requirement_value:
-                unlocked = True
-        
-        elif achievement.requirement_type == "streak":
-            # 연속 일수 계산
-            streak = calculate_streak(runs)
-            if streak >= achievement.requirement_value:
-                unlocked = True
-        
-        if unlocked:
-            user_achievement = models.UserAchievement(
-                user_id=user_id,
-                achievement_id=achievement.id
-            )
-            db.add(user_achievement)
+    candidates = {}
+    for requirement_type, value in changed.items():
+        for achievement in achievement_catalog.reached(db, requirement_type, value):
+            candidates[achievement.id] = achievement
+    
+    newly_unlocked = []
+    if candidates:
+        # 이미 달성한 업적 (후보 중에서만 확인)
+        unlocked_ids = {achievement_id for (achievement_id,) in db.query(models.UserAchievement.achievement_id).filter(
+            models.UserAchievement.user_id == user_id,
+            models.UserAchievement.achievement_id.in_(list(candidates))
+        )}
+        for achievement_id, achievement in candidates.items():
+            if achievement_id in unlocked_ids:
+                continue
+            db.add(models.UserAchievement(user_id=user_id, achievement_id=achievement_id))
             newly_unlocked.append(achievement)
     
-    db.commit()
+    db.flush()
     return newly_unlocked
 
+def _advance_streak(progress: models.AchievementProgress, dates, user_id: int, db: Session):
+    """
+    새 러닝 날짜들로 연속 일수 갱신
+    
+    마지막 러닝 날짜보다 이전 날짜가 들어오면(과거 기록 업로드) 이어 붙일 수 없으므로
+    날짜 목록으로 다시 계산합니다.
+    """
+    dates = sorted(set(dates))
+    if progress.last_run_date is not None and dates[0] < progress.last_run_date:
+        all_dates = [run_date for (run_date,) in db.query(models.Run.date).filter(models.Run.user_id == user_id)]
+        progress.current_streak = calculate_streak_from_dates(run_date.date() for run_date in all_dates)
+        progress.last_run_date = max(all_dates).date()
+        return
+    
+    streak = progress.current_streak or 0
+    last = progress.last_run_date
+    for day in dates:
+        if last is None or (day - last).days > 1:
+            streak = 1
+        elif (day - last).days == 1:
+            streak += 1
+        last = day
+    progress.current_streak = streak
+    progress.last_run_date = last
+
 def calculate_streak(runs):
     """연속 러닝 일수 계산"""
-    if not runs:
-        return 0
-    
-    dates = sorted(set(run.date.date() for run in runs), reverse=True)
+    return calculate_streak_from_dates(run.date.date() for run in runs)
+
+def calculate_streak_from_dates(dates):
+    """가장 최근 러닝 날짜까지의 연속 러닝 일수"""
+    dates = sorted(set(dates), reverse=True)
     if not dates:
         return 0
     
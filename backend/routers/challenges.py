@@ -2,9 +2,10 @@
 챌린지 (친구와 뛰어) 관련 API
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, insert, update, delete, func, case, and_
 from sqlalchemy.orm import Session
 from typing import List
-from datetime import datetime
+from datetime import datetime, timedelta
 import models
 import schemas
 from database import get_db
@@ -12,6 +13,8 @@ from auth import oauth2_scheme, decode_token
 
 router = APIRouter(prefix="/api/challenges", tags=["challenges"])
 
+CHALLENGE_BATCH_SIZE = 500  # 한 번에 종료/보관 처리할 챌린지 수
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     payload = decode_token(token)
     if payload is None:
@@ -39,16 +42,20 @@ def create_challenge(challenge: schemas.ChallengeCreate, current_user: models.Us
     # 생성자도 참가자로 추가
     creator_participant = models.ChallengeParticipant(
         challenge_id=db_challenge.id,
-        user_id=current_user.id
+        user_id=current_user.id,
+        rank=1
     )
     db.add(creator_participant)
     
-    # 다른 참가자 추가
+    # 다른 참가자 추가 (모두 0이므로 추가 순서가 곧 순위)
+    rank = 1
     for participant_id in challenge.participant_ids:
         if participant_id != current_user.id:
+            rank += 1
             participant = models.ChallengeParticipant(
                 challenge_id=db_challenge.id,
-                user_id=participant_id
+                user_id=participant_id,
+                rank=rank
             )
             db.add(participant)
     
@@ -60,55 +67,19 @@ def create_challenge(challenge: schemas.ChallengeCreate, current_user: models.Us
 @router.get("/")
 def get_challenges(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """내 챌린지 목록"""
-    # 내가 참여 중인 챌린지
-    participants = db.query(models.ChallengeParticipant).filter(
+    # 내가 참여 중인 진행 중 챌린지
+    my_challenge_ids = select(models.ChallengeParticipant.challenge_id).where(
         models.ChallengeParticipant.user_id == current_user.id
-    ).all()
-    
-    challenge_ids = [p.challenge_id for p in participants]
+    )
     challenges = db.query(models.Challenge).filter(
-        models.Challenge.id.in_(challenge_ids),
+        models.Challenge.id.in_(my_challenge_ids),
         models.Challenge.is_active == True
-    ).all()
+    ).order_by(models.Challenge.id).all()
     
-    results = []
-    for challenge in challenges:
-        # 참가자 정보
-        participants = db.query(models.ChallengeParticipant).filter(
-            models.ChallengeParticipant.challenge_id == challenge.id
-        ).all()
-        
-        participant_list = []
-        for p in participants:
-            user = db.query(models.User).filter(models.User.id == p.user_id).first()
-            profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == p.user_id).first()
-            
-            participant_list.append({
-                "user_id": user.id,
-                "username": user.username,
-                "avatar_url": profile.avatar_url if profile else None,
-                "current_value": p.current_value,
-                "completed_at": p.completed_at,
-                "rank": p.rank
-            })
-        
-        # 순위 정렬
-        participant_list.sort(key=lambda x: (-x["current_value"], x["completed_at"] or datetime.max))
-        for i, p in enumerate(participant_list, 1):
-            p["rank"] = i
-        
-        results.append({
-            "id": challenge.id,
-            "name": challenge.name,
-            "challenge_type": challenge.challenge_type,
-            "target_value": challenge.target_value,
-            "start_date": challenge.start_date,
-            "end_date": challenge.end_date,
-            "is_active": challenge.is_active,
-            "participants": participant_list
-        })
+    # 모든 챌린지의 참가자 정보를 한 번에 조회
+    participants = _participants_by_challenge(db, [challenge.id for challenge in challenges])
     
-    return results
+    return [_challenge_response(challenge, participants.get(challenge.id, [])) for challenge in challenges]
 
 @router.get("/{challenge_id}")
 def get_challenge(challenge_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -117,39 +88,53 @@ def get_challenge(challenge_id: int, current_user: models.User = Depends(get_cur
     if not challenge:
         raise HTTPException(status_code=404, detail="챌린지를 찾을 수 없습니다")
     
-    # 참가자 확인
-    participant = db.query(models.ChallengeParticipant).filter(
-        models.ChallengeParticipant.challenge_id == challenge_id,
-        models.ChallengeParticipant.user_id == current_user.id
-    ).first()
+    # 보관된 챌린지는 보관 테이블에서 최종 순위를 읽습니다.
+    source = models.ChallengeParticipantArchive if challenge.archived_at else models.ChallengeParticipant
+    participant_list = _participants_by_challenge(db, [challenge_id], source).get(challenge_id, [])
     
-    if not participant:
+    # 참가자 확인
+    if not any(p["user_id"] == current_user.id for p in participant_list):
         raise HTTPException(status_code=403, detail="참가자가 아닙니다")
     
-    # 참가자 정보
-    participants = db.query(models.ChallengeParticipant).filter(
-        models.ChallengeParticipant.challenge_id == challenge_id
-    ).all()
-    
-    participant_list = []
-    for p in participants:
-        user = db.query(models.User).filter(models.User.id == p.user_id).first()
-        profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == p.user_id).first()
-        
-        participant_list.append({
-            "user_id": user.id,
-            "username": user.username,
-            "avatar_url": profile.avatar_url if profile else None,
-            "current_value": p.current_value,
-            "completed_at": p.completed_at,
-            "rank": p.rank
-        })
+    return _challenge_response(challenge, participant_list)
+
+def _participants_by_challenge(db: Session, challenge_ids, participant=models.ChallengeParticipant):
+    """
+    챌린지 id -> 순위 순 참가자 정보 목록 (참가자/사용자/프로필을 조인한 쿼리 한 번)
+    """
+    if not challenge_ids:
+        return {}
     
-    # 순위 정렬
-    participant_list.sort(key=lambda x: (-x["current_value"], x["completed_at"] or datetime.max))
-    for i, p in enumerate(participant_list, 1):
-        p["rank"] = i
+    rows = db.query(
+        participant.challenge_id,
+        models.User.id,
+        models.User.username,
+        models.UserProfile.avatar_url,
+        participant.current_value,
+        participant.completed_at,
+        participant.rank
+    ).join(
+        models.User, models.User.id == participant.user_id
+    ).outerjoin(
+        models.UserProfile, models.UserProfile.user_id == participant.user_id
+    ).filter(
+        participant.challenge_id.in_(challenge_ids)
+    ).order_by(participant.challenge_id, participant.rank)
     
+    results = {}
+    for challenge_id, user_id, username, avatar_url, current_value, completed_at, rank in rows:
+        results.setdefault(challenge_id, []).append({
+            "user_id": user_id,
+            "username": username,
+            "avatar_url": avatar_url,
+            "current_value": current_value,
+            "completed_at": completed_at,
+            "rank": rank
+        })
+    return results
+
+def _challenge_response(challenge: models.Challenge, participant_list):
+    # 참가자는 저장된 순위 순으로 조회되므로 다시 정렬하지 않습니다.
     return {
         "id": challenge.id,
         "name": challenge.name,
@@ -161,37 +146,257 @@ def get_challenge(challenge_id: int, current_user: models.User = Depends(get_cur
         "participants": participant_list
     }
 
+def _ahead_of(other, value: float, completed_at, participant_id: int):
+    """
+    other 참가자가 (value, completed_at, participant_id) 참가자보다 순위가 높은 조건
+    
+    순위: 진행도 내림차순 → 먼저 달성한 순(미달성은 뒤) → 참가 순(id)
+    """
+    if completed_at is None:
+        completed_first = other.completed_at.isnot(None) | (other.completed_at.is_(None) & (other.id < participant_id))
+    else:
+        completed_first = (other.completed_at < completed_at) | ((other.completed_at == completed_at) & (other.id < participant_id))
+    return (other.current_value > value) | ((other.current_value == value) & completed_first)
+
+def update_participant_rank(db: Session, challenge_id: int, participant_id: int, value: float, completed_at, old_rank):
+    """
+    진행도가 바뀐 참가자 한 명의 순위 갱신 (바뀐 값이 DB에 반영된 뒤 호출, 커밋은 호출한 쪽에서)
+    
+    새 순위를 COUNT 한 번으로 구하고, 이전 순위와 새 순위 사이의 참가자만
+    한 칸씩 밀거나 당깁니다. 순위가 없는 챌린지는 전체 순위를 다시 계산합니다.
+    다른 참가자 행을 고치므로 호출한 쪽이 참가자 행을 고치기 전에 _lock_challenges로
+    챌린지 행을 잠가 두어야 합니다.
+    """
+    participant = models.ChallengeParticipant
+    if old_rank is None:
+        rebuild_challenge_ranks(db, [challenge_id])
+        return
+    
+    new_rank = 1 + db.query(func.count(participant.id)).filter(
+        participant.challenge_id == challenge_id,
+        participant.id != participant_id,
+        _ahead_of(participant, value, completed_at, participant_id)
+    ).scalar()
+    if new_rank == old_rank:
+        return
+    
+    if new_rank < old_rank:
+        shift = participant.rank + 1
+        between = participant.rank.between(new_rank, old_rank - 1)
+    else:
+        shift = participant.rank - 1
+        between = participant.rank.between(old_rank + 1, new_rank)
+    db.execute(
+        update(participant)
+        .where(participant.challenge_id == challenge_id, participant.id != participant_id, between)
+        .values(rank=shift)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(participant)
+        .where(participant.id == participant_id)
+        .values(rank=new_rank)
+        .execution_options(synchronize_session=False)
+    )
+
+def rebuild_challenge_ranks(db: Session, challenge_ids=None):
+    """
+    챌린지 참가자 순위 전체 재계산 (ROW_NUMBER 한 번, 복구/최종 확정용, 커밋은 호출한 쪽에서)
+    """
+    participant = models.ChallengeParticipant
+    ranked = select(
+        participant.id.label("participant_id"),
+        func.row_number().over(
+            partition_by=participant.challenge_id,
+            order_by=(
+                participant.current_value.desc(),
+                participant.completed_at.is_(None),
+                participant.completed_at,
+                participant.id
+            )
+        ).label("new_rank")
+    )
+    if challenge_ids is not None:
+        ranked = ranked.where(participant.challenge_id.in_(challenge_ids))
+    ranked = ranked.subquery()
+    
+    stmt = update(participant).values(
+        rank=select(ranked.c.new_rank).where(ranked.c.participant_id == participant.id).scalar_subquery()
+    )
+    if challenge_ids is not None:
+        stmt = stmt.where(participant.challenge_id.in_(challenge_ids))
+    db.execute(stmt.execution_options(synchronize_session=False))
+
 def update_challenge_progress(user_id: int, db: Session):
-    """챌린지 진행도 업데이트 (러닝 기록 후 호출)"""
-    # 사용자가 참여 중인 챌린지
-    participants = db.query(models.ChallengeParticipant).filter(
-        models.ChallengeParticipant.user_id == user_id
+    """
+    사용자가 참여 중인 진행 중 챌린지의 진행도 다시 계산 (여러 기록을 한 번에 반영할 때)
+    
+    모든 진행 중 챌린지의 current_value/completed_at을 상관 서브쿼리로 계산하는
+    UPDATE 한 번으로 갱신하고, 갱신된 참가자의 순위를 옮깁니다. 커밋은 호출한 쪽에서 합니다.
+    """
+    participant, challenge, run = models.ChallengeParticipant, models.Challenge, models.Run
+    
+    window_runs = and_(
+        run.user_id == participant.user_id,
+        run.date >= challenge.start_date,
+        run.date <= challenge.end_date
+    )
+    new_value = select(
+        case(
+            (challenge.challenge_type == "distance", func.coalesce(func.sum(run.distance), 0)),
+            (challenge.challenge_type == "time", func.coalesce(func.sum(run.duration), 0) / 60.0),
+            else_=participant.current_value
+        )
+    ).select_from(challenge).outerjoin(run, window_runs).where(
+        challenge.id == participant.challenge_id
+    ).group_by(challenge.id, challenge.challenge_type).scalar_subquery()
+    
+    _apply_progress(db, new_value, participant.user_id == user_id, participant.challenge_id.in_(
+        select(challenge.id).where(challenge.is_active == True)
+    ))
+
+def increment_challenge_progress(user_id: int, db: Session, run_date: datetime, distance: float, duration: float):
+    """
+    새 러닝 기록 하나를 기간이 맞는 진행 중 챌린지에 누적 (커밋은 호출한 쪽에서)
+    """
+    participant, challenge = models.ChallengeParticipant, models.Challenge
+    challenge_type = select(challenge.challenge_type).where(challenge.id == participant.challenge_id).scalar_subquery()
+    new_value = participant.current_value + case(
+        (challenge_type == "distance", distance),
+        (challenge_type == "time", duration / 60),
+        else_=0
+    )
+    
+    _apply_progress(db, new_value, participant.user_id == user_id, participant.challenge_id.in_(
+        select(challenge.id).where(
+            challenge.is_active == True,
+            challenge.start_date <= run_date,
+            challenge.end_date >= run_date
+        )
+    ))
+
+def _lock_challenges(db: Session, challenge_ids):
+    """
+    챌린지 행을 id 순서로 잠그기 (PostgreSQL SELECT ... FOR UPDATE, 잠근 id 목록 반환)
+    
+    잠금 순서: 챌린지 행(id 순) → 참가자 행. 진행도/순위를 바꾸는 트랜잭션이 모두
+    이 순서를 따르므로, 같은 챌린지의 두 사용자 기록이 동시에 처리되어도 서로의
+    참가자 행을 기다리며 교착 상태에 빠지지 않고 챌린지 잠금에서 차례로 기다립니다.
+    """
+    if not challenge_ids:
+        return []
+    return [challenge_id for (challenge_id,) in db.query(models.Challenge.id).filter(
+        models.Challenge.id.in_(challenge_ids)
+    ).order_by(models.Challenge.id).with_for_update()]
+
+def _apply_progress(db: Session, new_value, *criteria):
+    """
+    조건에 맞는 참가자의 진행도를 new_value로 바꾸고 달성 시각/순위 갱신
+    
+    SET 절의 컬럼은 갱신 전 값을 가리키므로 completed_at도 new_value로 판단합니다.
+    참가자 행을 고치기 전에 해당 챌린지 행을 먼저 잠급니다 (_lock_challenges).
+    """
+    participant, challenge = models.ChallengeParticipant, models.Challenge
+    challenge_ids = _lock_challenges(db, db.scalars(
+        select(participant.challenge_id).where(*criteria).distinct()
+    ).all())
+    if not challenge_ids:
+        return
+    target_value = select(challenge.target_value).where(challenge.id == participant.challenge_id).scalar_subquery()
+    
+    changed = db.execute(
+        update(participant)
+        .where(*criteria, participant.challenge_id.in_(challenge_ids))
+        .values(
+            current_value=new_value,
+            completed_at=case(
+                (participant.completed_at.is_(None) & (new_value >= target_value), datetime.utcnow()),
+                else_=participant.completed_at
+            )
+        )
+        .returning(participant.id, participant.challenge_id, participant.current_value, participant.completed_at, participant.rank)
+        .execution_options(synchronize_session=False)
     ).all()
     
-    for participant in participants:
-        challenge = db.query(models.Challenge).filter(
-            models.Challenge.id == participant.challenge_id,
-            models.Challenge.is_active == True
-        ).first()
-        
-        if not challenge:
-            continue
+    for participant_id, challenge_id, current_value, completed_at, rank in changed:
+        update_participant_rank(db, challenge_id, participant_id, current_value, completed_at, rank)
+
+def finalize_challenges(db: Session, now: datetime = None) -> int:
+    """
+    종료일이 지난 챌린지 마감 (스케줄러에서 호출)
+    
+    CHALLENGE_BATCH_SIZE개씩 조건부 UPDATE ... RETURNING으로 is_active를 끄고,
+    마감한 챌린지의 순위를 ROW_NUMBER로 다시 계산해 최종 순위로 확정합니다.
+    
+    Returns:
+        마감한 챌린지 수
+    """
+    now = now or datetime.utcnow()
+    challenge = models.Challenge
+    total = 0
+    
+    while True:
+        batch = select(challenge.id).where(
+            challenge.is_active == True,
+            challenge.end_date <= now
+        ).order_by(challenge.id).limit(CHALLENGE_BATCH_SIZE)
+        closed_ids = db.scalars(
+            update(challenge)
+            .where(challenge.id.in_(batch), challenge.is_active == True)
+            .values(is_active=False)
+            .returning(challenge.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if closed_ids:
+            rebuild_challenge_ranks(db, closed_ids)
+        db.commit()
         
-        # 챌린지 기간 내 러닝 기록
-        runs = db.query(models.Run).filter(
-            models.Run.user_id == user_id,
-            models.Run.date >= challenge.start_date,
-            models.Run.date <= challenge.end_date
+        total += len(closed_ids)
+        if len(closed_ids) < CHALLENGE_BATCH_SIZE:
+            return total
+
+def archive_challenges(db: Session, older_than: timedelta, now: datetime = None) -> int:
+    """
+    마감 후 older_than이 지난 챌린지의 참가자 행을 보관 테이블로 이동 (스케줄러에서 호출)
+    
+    진행 중 챌린지 조회/갱신이 읽는 challenge_participants를 작게 유지합니다.
+    
+    Returns:
+        보관한 챌린지 수
+    """
+    now = now or datetime.utcnow()
+    challenge, participant, archive = models.Challenge, models.ChallengeParticipant, models.ChallengeParticipantArchive
+    columns = ["id", "challenge_id", "user_id", "current_value", "completed_at", "rank"]
+    total = 0
+    
+    while True:
+        challenge_ids = db.scalars(
+            select(challenge.id).where(
+                challenge.is_active == False,
+                challenge.archived_at.is_(None),
+                challenge.end_date <= now - older_than
+            ).order_by(challenge.id).limit(CHALLENGE_BATCH_SIZE)
         ).all()
+        if not challenge_ids:
+            return total
         
-        # 진행도 계산
-        if challenge.challenge_type == "distance":
-            participant.current_value = sum(run.distance for run in runs)
-        elif challenge.challenge_type == "time":
-            participant.current_value = sum(run.duration for run in runs) / 60
+        db.execute(insert(archive).from_select(
+            columns,
+            select(*(getattr(participant, column) for column in columns)).where(participant.challenge_id.in_(challenge_ids))
+        ))
+        db.execute(
+            delete(participant)
+            .where(participant.challenge_id.in_(challenge_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(challenge)
+            .where(challenge.id.in_(challenge_ids))
+            .values(archived_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
         
-        # 목표 달성 확인
-        if participant.current_value >= challenge.target_value and not participant.completed_at:
-            participant.completed_at = datetime.utcnow()
-    
-    db.commit()
+        total += len(challenge_ids)
+        if len(challenge_ids) < CHALLENGE_BATCH_SIZE:
+            return total
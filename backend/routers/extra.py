@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from services.weather_service import weather_service
@@ -21,17 +23,42 @@ class CourseRequest(BaseModel):
     preference: str
 
 @router.get("/api/weather")
-def get_weather_info(lat: float, lon: float):
-    """날씨 정보"""
-    return weather_service.get_weather(lat, lon)
+async def get_weather_info(lat: float, lon: float, hours_ahead: int = Query(0, ge=0, le=48)):
+    """날씨 정보 (hours_ahead시간 뒤 예보)"""
+    return await weather_service.get_weather(lat, lon, hours_ahead=hours_ahead)
+
+@router.get("/api/weather/best-window")
+async def get_best_running_window(lat: float, lon: float, duration_hours: int = Query(1, ge=1, le=6)):
+    """오늘 남은 시간 중 러닝하기 가장 좋은 시간대"""
+    return await weather_service.get_best_running_window(lat, lon, duration_hours=duration_hours)
 
 @router.get("/api/facilities/indoor")
-def get_indoor_facilities_api(lat: float, lon: float, weather_condition: str = "bad"):
-    """실내 시설 추천"""
-    facilities = facility_service.get_indoor_facilities(lat, lon, max_distance=5.0, weather_condition=weather_condition)
-    weather_data = weather_service.get_weather(lat, lon)
+async def get_indoor_facilities_api(lat: float, lon: float, weather_condition: str = "bad"):
+    """
+    실내 시설 추천
+    
+    시설 후보 검색(스레드풀)과 날씨 조회(캐시)를 동시에 진행하고, 예보로 정한
+    날씨 상태로 후보를 거릅니다. 예보를 가져올 수 없으면 요청의 weather_condition을 씁니다.
+    """
+    # 시설 검색은 pandas 연산이므로 스레드풀에서 실행합니다.
+    candidates, weather_data = await asyncio.gather(
+        run_in_threadpool(facility_service.find_nearby_candidates, lat, lon, max_distance=5.0),
+        weather_service.get_weather(lat, lon)
+    )
+    condition = facility_condition_from_weather(weather_data) or weather_condition
+    facilities = facility_service.filter_by_weather(candidates, condition)
     return {"facilities": facilities, "reason": weather_data['recommendation'], "weather_condition": weather_data['condition']}
 
+def facility_condition_from_weather(weather_data: dict):
+    """예보를 시설 검색용 날씨 상태(rain, snow, bad, good)로 변환 (정보가 없으면 None)"""
+    if weather_data['is_good_for_running'] is None:
+        return None
+    if weather_data['precipitation']:
+        # 기온 예보가 빠진 시각이면 눈인지 알 수 없으므로 비로 봅니다.
+        temperature = weather_data['temperature']
+        return "snow" if temperature is not None and temperature <= 0 else "rain"
+    return "good" if weather_data['is_good_for_running'] else "bad"
+
 @router.post("/generate_course")
 def generate_course_endpoint(request: CourseRequest):
     """러닝 코스 생성"""
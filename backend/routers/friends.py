@@ -1,16 +1,21 @@
 """
 친구 관련 API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, update, delete, tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import models
 import schemas
 from database import get_db
 from auth import oauth2_scheme, decode_token
+from services.user_search import search_user_ids, SEARCH_MAX_RESULTS
+from services.feed import read_feed, remove_friend_entries
 
 router = APIRouter(prefix="/api/friends", tags=["friends"])
 
+MAX_FRIENDS = 20  # 사용자당 최대 친구 수
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     payload = decode_token(token)
     if payload is None:
@@ -22,37 +27,54 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="사용자를 찾을 수 없습니다")
     return user
 
+def _friend_info_columns():
+    """친구 정보 응답에 필요한 컬럼 (User + UserProfile 외부 조인)"""
+    return (
+        models.User.id,
+        models.User.username,
+        models.UserProfile.avatar_url,
+        models.UserProfile.level,
+        models.UserProfile.total_distance
+    )
+
+def _friend_info(user_id, username, avatar_url, level, total_distance):
+    """조회한 행을 ORM 객체 없이 바로 응답 형태로 변환 (프로필이 없으면 기본값)"""
+    return {
+        "id": user_id,
+        "username": username,
+        "avatar_url": avatar_url,
+        "level": level if level is not None else 1,
+        "total_distance": total_distance if total_distance is not None else 0
+    }
+
 @router.get("/search")
-def search_users(username: str, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """닉네임으로 사용자 검색"""
-    users = db.query(models.User).filter(
-        models.User.username.ilike(f"%{username}%"),
-        models.User.id != current_user.id
-    ).limit(10).all()
-    
-    results = []
-    for user in users:
-        profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == user.id).first()
-        results.append({
-            "id": user.id,
-            "username": user.username,
-            "avatar_url": profile.avatar_url if profile else None,
-            "level": profile.level if profile else 1,
-            "total_distance": profile.total_distance if profile else 0
-        })
-    
-    return results
+def search_users(
+    username: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, lt=SEARCH_MAX_RESULTS),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    닉네임으로 사용자 검색 (정확히 일치 → 접두어 일치 → 부분 일치 순, 최대 100명까지 페이지 단위)
+    """
+    user_ids = search_user_ids(db, username, current_user.id, limit=limit, offset=offset)
+    if not user_ids:
+        return []
+    
+    rows = db.query(*_friend_info_columns()).outerjoin(
+        models.UserProfile, models.UserProfile.user_id == models.User.id
+    ).filter(models.User.id.in_(user_ids))
+    
+    # 검색 순위 순서로 응답합니다.
+    infos = {row[0]: _friend_info(*row) for row in rows}
+    return [infos[user_id] for user_id in user_ids if user_id in infos]
 
 @router.post("/request")
 def send_friend_request(friend_username: str, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """친구 요청 보내기"""
     # 현재 친구 수 확인 (최대 20명)
-    current_friends_count = db.query(models.Friendship).filter(
-        ((models.Friendship.user_id == current_user.id) | (models.Friendship.friend_id == current_user.id)),
-        models.Friendship.status == "accepted"
-    ).count()
-    
-    if current_friends_count >= 20:
+    if current_user.friend_count >= MAX_FRIENDS:
         raise HTTPException(status_code=400, detail="친구는 최대 20명까지만 등록할 수 있습니다")
     
     friend = db.query(models.User).filter(models.User.username == friend_username).first()
@@ -63,25 +85,22 @@ def send_friend_request(friend_username: str, current_user: models.User = Depend
         raise HTTPException(status_code=400, detail="자기 자신을 친구로 추가할 수 없습니다")
     
     # 상대방의 친구 수도 확인
-    friend_count = db.query(models.Friendship).filter(
-        ((models.Friendship.user_id == friend.id) | (models.Friendship.friend_id == friend.id)),
-        models.Friendship.status == "accepted"
-    ).count()
-    
-    if friend_count >= 20:
+    if friend.friend_count >= MAX_FRIENDS:
         raise HTTPException(status_code=400, detail="상대방의 친구 목록이 가득 찼습니다")
     
-    # 이미 친구 요청이 있는지 확인
-    existing = db.query(models.Friendship).filter(
-        ((models.Friendship.user_id == current_user.id) & (models.Friendship.friend_id == friend.id)) |
-        ((models.Friendship.user_id == friend.id) & (models.Friendship.friend_id == current_user.id))
+    # 이미 친구인지 / 친구 요청이 있는지 확인 (모두 인덱스 조회)
+    if db.get(models.FriendEdge, (current_user.id, friend.id)) is not None:
+        raise HTTPException(status_code=400, detail="이미 친구입니다")
+    
+    existing = db.query(models.Friendship.id).filter(
+        tuple_(models.Friendship.user_id, models.Friendship.friend_id).in_([
+            (current_user.id, friend.id),
+            (friend.id, current_user.id)
+        ])
     ).first()
     
     if existing:
-        if existing.status == "accepted":
-            raise HTTPException(status_code=400, detail="이미 친구입니다")
-        else:
-            raise HTTPException(status_code=400, detail="이미 친구 요청을 보냈습니다")
+        raise HTTPException(status_code=400, detail="이미 친구 요청을 보냈습니다")
     
     friendship = models.Friendship(user_id=current_user.id, friend_id=friend.id, status="pending")
     db.add(friendship)
@@ -92,23 +111,30 @@ def send_friend_request(friend_username: str, current_user: models.User = Depend
 @router.get("/requests")
 def get_friend_requests(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """받은 친구 요청 목록"""
-    requests = db.query(models.Friendship).filter(
+    rows = db.query(
+        models.Friendship.id,
+        models.Friendship.created_at,
+        *_friend_info_columns()
+    ).join(
+        models.User, models.User.id == models.Friendship.user_id
+    ).outerjoin(
+        models.UserProfile, models.UserProfile.user_id == models.User.id
+    ).filter(
         models.Friendship.friend_id == current_user.id,
         models.Friendship.status == "pending"
-    ).all()
+    )
     
     results = []
-    for req in requests:
-        user = db.query(models.User).filter(models.User.id == req.user_id).first()
-        profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == user.id).first()
+    for friendship_id, created_at, *user in rows:
+        info = _friend_info(*user)
         results.append({
-            "id": req.id,
-            "user_id": user.id,
-            "username": user.username,
-            "avatar_url": profile.avatar_url if profile else None,
-            "level": profile.level if profile else 1,
-            "total_distance": profile.total_distance if profile else 0,
-            "created_at": req.created_at
+            "id": friendship_id,
+            "user_id": info["id"],
+            "username": info["username"],
+            "avatar_url": info["avatar_url"],
+            "level": info["level"],
+            "total_distance": info["total_distance"],
+            "created_at": created_at
         })
     
     return results
@@ -117,33 +143,45 @@ def get_friend_requests(current_user: models.User = Depends(get_current_user), d
 def accept_friend_request(friendship_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """친구 요청 수락"""
     # 현재 친구 수 확인 (최대 20명)
-    current_friends_count = db.query(models.Friendship).filter(
-        ((models.Friendship.user_id == current_user.id) | (models.Friendship.friend_id == current_user.id)),
-        models.Friendship.status == "accepted"
-    ).count()
-    
-    if current_friends_count >= 20:
+    if current_user.friend_count >= MAX_FRIENDS:
         raise HTTPException(status_code=400, detail="친구는 최대 20명까지만 등록할 수 있습니다")
     
     friendship = db.query(models.Friendship).filter(
         models.Friendship.id == friendship_id,
-        models.Friendship.friend_id == current_user.id
+        models.Friendship.friend_id == current_user.id,
+        models.Friendship.status == "pending"
     ).first()
     
     if not friendship:
         raise HTTPException(status_code=404, detail="친구 요청을 찾을 수 없습니다")
     
+    # 두 사람 모두 자리가 있을 때만 친구 수를 올립니다 (동시 수락에도 최대 인원 유지).
+    result = db.execute(
+        update(models.User)
+        .where(models.User.id.in_([friendship.user_id, current_user.id]), models.User.friend_count < MAX_FRIENDS)
+        .values(friend_count=models.User.friend_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 2:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="친구 목록이 가득 찼습니다")
+    
     friendship.status = "accepted"
+    db.add_all([
+        models.FriendEdge(user_id=friendship.user_id, friend_id=current_user.id, friendship_id=friendship.id),
+        models.FriendEdge(user_id=current_user.id, friend_id=friendship.user_id, friendship_id=friendship.id)
+    ])
     db.commit()
     
     return {"message": "Friend request accepted"}
 
 @router.post("/reject/{friendship_id}")
 def reject_friend_request(friendship_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """친구 요청 거절"""
+    """친구 요청 거절 (수락된 관계는 DELETE /api/friends/{friend_id}로 삭제)"""
     friendship = db.query(models.Friendship).filter(
         models.Friendship.id == friendship_id,
-        models.Friendship.friend_id == current_user.id
+        models.Friendship.friend_id == current_user.id,
+        models.Friendship.status == "pending"
     ).first()
     
     if not friendship:
@@ -157,40 +195,61 @@ def reject_friend_request(friendship_id: int, current_user: models.User = Depend
 @router.get("/list")
 def get_friends(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """친구 목록"""
-    friendships = db.query(models.Friendship).filter(
-        ((models.Friendship.user_id == current_user.id) | (models.Friendship.friend_id == current_user.id)),
-        models.Friendship.status == "accepted"
-    ).all()
-    
-    results = []
-    for friendship in friendships:
-        friend_id = friendship.friend_id if friendship.user_id == current_user.id else friendship.user_id
-        friend = db.query(models.User).filter(models.User.id == friend_id).first()
-        profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == friend.id).first()
-        
-        results.append({
-            "id": friend.id,
-            "username": friend.username,
-            "avatar_url": profile.avatar_url if profile else None,
-            "level": profile.level if profile else 1,
-            "total_distance": profile.total_distance if profile else 0
-        })
-    
-    return results
+    rows = db.query(*_friend_info_columns()).select_from(models.FriendEdge).join(
+        models.User, models.User.id == models.FriendEdge.friend_id
+    ).outerjoin(
+        models.UserProfile, models.UserProfile.user_id == models.User.id
+    ).filter(
+        models.FriendEdge.user_id == current_user.id
+    )
+    
+    return [_friend_info(*row) for row in rows]
+
+@router.get("/feed")
+def get_friend_feed(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=50),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    친구들의 최근 러닝 기록 (최신순, 다음 페이지는 next_cursor로 조회)
+    """
+    try:
+        items, next_cursor = read_feed(db, current_user.id, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 cursor입니다")
+    
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.delete("/{friend_id}")
 def remove_friend(friend_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """친구 삭제"""
-    friendship = db.query(models.Friendship).filter(
-        ((models.Friendship.user_id == current_user.id) & (models.Friendship.friend_id == friend_id)) |
-        ((models.Friendship.user_id == friend_id) & (models.Friendship.friend_id == current_user.id)),
-        models.Friendship.status == "accepted"
-    ).first()
-    
-    if not friendship:
+    edge = db.get(models.FriendEdge, (current_user.id, friend_id))
+    if not edge:
         raise HTTPException(status_code=404, detail="친구 관계를 찾을 수 없습니다")
     
-    db.delete(friendship)
+    edges = models.FriendEdge
+    deleted = db.execute(
+        delete(edges)
+        .where(tuple_(edges.user_id, edges.friend_id).in_([(current_user.id, friend_id), (friend_id, current_user.id)]))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if deleted:
+        db.execute(
+            update(models.User)
+            .where(models.User.id.in_([current_user.id, friend_id]))
+            .values(friend_count=case((models.User.friend_count > 0, models.User.friend_count - 1), else_=0))
+            .execution_options(synchronize_session=False)
+        )
+    # 양쪽에서 서로 요청해 수락된 행이 두 개인 쌍도 있으므로 (0008 마이그레이션) 방향과 관계없이 모두 지웁니다.
+    friendships = models.Friendship
+    db.execute(
+        delete(friendships)
+        .where(tuple_(friendships.user_id, friendships.friend_id).in_([(current_user.id, friend_id), (friend_id, current_user.id)]))
+        .execution_options(synchronize_session=False)
+    )
+    remove_friend_entries(db, current_user.id, friend_id)
     db.commit()
     
     return {"message": "Friend removed"}
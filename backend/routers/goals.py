@@ -2,6 +2,7 @@
 목표 관련 API
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, insert, update, func, case, and_, or_, bindparam
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime, timedelta
@@ -12,6 +13,14 @@ from auth import oauth2_scheme, decode_token
 
 router = APIRouter(prefix="/api/goals", tags=["goals"])
 
+# 목표 기간 길이
+PERIOD_LENGTHS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+    "monthly": timedelta(days=30),
+}
+GOAL_EXPIRE_BATCH_SIZE = 1000  # 한 번에 종료 처리할 목표 수
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     payload = decode_token(token)
     if payload is None:
@@ -27,20 +36,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 def create_goal(goal: schemas.GoalCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """목표 생성"""
     # 종료 날짜 계산
+    start_date = datetime.utcnow()
     end_date = None
-    if goal.period == "daily":
-        end_date = datetime.utcnow() + timedelta(days=1)
-    elif goal.period == "weekly":
-        end_date = datetime.utcnow() + timedelta(weeks=1)
-    elif goal.period == "monthly":
-        end_date = datetime.utcnow() + timedelta(days=30)
+    if goal.period in PERIOD_LENGTHS:
+        end_date = start_date + PERIOD_LENGTHS[goal.period]
     
     db_goal = models.Goal(
         user_id=current_user.id,
         goal_type=goal.goal_type,
         target_value=goal.target_value,
         period=goal.period,
-        end_date=end_date
+        start_date=start_date,
+        end_date=end_date,
+        # 종료일이 없는 목표는 반복할 수 없습니다.
+        is_recurring=goal.is_recurring and end_date is not None
     )
     db.add(db_goal)
     db.commit()
@@ -50,10 +59,13 @@ def create_goal(goal: schemas.GoalCreate, current_user: models.User = Depends(ge
 
 @router.get("/", response_model=List[schemas.Goal])
 def get_goals(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """목표 목록"""
+    """목표 목록 (기간이 남은 진행 중 목표)"""
     goals = db.query(models.Goal).filter(
         models.Goal.user_id == current_user.id,
-        models.Goal.is_completed == False
+        models.Goal.is_expired == False,
+        models.Goal.is_completed == False,
+        # 스케줄러가 아직 종료 처리하지 않은 목표도 제외합니다.
+        or_(models.Goal.end_date.is_(None), models.Goal.end_date > datetime.utcnow())
     ).all()
     
     return goals
@@ -84,35 +96,145 @@ def delete_goal(goal_id: int, current_user: models.User = Depends(get_current_us
     
     return {"message": "Goal deleted"}
 
-def update_goal_progress(user_id: int, db: Session):
-    """목표 진행도 업데이트 (러닝 기록 후 호출)"""
-    goals = db.query(models.Goal).filter(
-        models.Goal.user_id == user_id,
-        models.Goal.is_completed == False
-    ).all()
+def increment_goal_progress(user_id: int, db: Session, runs):
+    """
+    새 러닝 기록을 진행 중인 목표에 누적 (기록 저장과 같은 트랜잭션에서 호출)
+    
+    기록마다 기간이 맞는 목표만 DB에서 원자적으로 더하는 UPDATE 하나를 실행하며
+    (executemany), 목표 달성 여부도 같은 문장에서 갱신합니다. 커밋은 호출한 쪽에서 합니다.
+    
+    Args:
+        runs: (date, distance, duration) 목록 - 날짜 순으로 넘겨야 합니다
+    """
+    if not runs:
+        return
     
-    for goal in goals:
-        # 기간 내 러닝 기록 조회
-        runs = db.query(models.Run).filter(
-            models.Run.user_id == user_id,
-            models.Run.date >= goal.start_date
+    goals = models.Goal.__table__
+    # SET 절의 컬럼은 갱신 전 값을 가리키므로 is_completed도 새 값으로 판단합니다.
+    new_value = goals.c.current_value + case(
+        (goals.c.goal_type == "distance", bindparam("add_distance")),
+        (goals.c.goal_type == "runs", 1),
+        (goals.c.goal_type == "time", bindparam("add_minutes")),
+        else_=0
+    )
+    stmt = (
+        update(goals)
+        .where(
+            goals.c.user_id == bindparam("goal_user_id"),
+            goals.c.is_expired == False,
+            goals.c.is_completed == False,
+            goals.c.start_date <= bindparam("run_date"),
+            or_(goals.c.end_date.is_(None), goals.c.end_date >= bindparam("run_date"))
         )
+        .values(current_value=new_value, is_completed=new_value >= goals.c.target_value)
+    )
+    db.execute(stmt, [
+        {
+            "goal_user_id": user_id,
+            "run_date": run_date,
+            "add_distance": distance,
+            "add_minutes": duration / 60  # 분 단위
+        }
+        for run_date, distance, duration in runs
+    ])
+
+def _recompute_goals(db: Session, *criteria):
+    """
+    조건에 맞는 목표들의 진행도를 기간 내 러닝 기록 합계로 다시 계산 (커밋은 호출한 쪽에서)
+    
+    기간별 합계를 GROUP BY 쿼리 한 번으로 구하고 일괄 UPDATE 한 번으로 저장합니다.
+    러닝 기록 저장 시에는 increment_goal_progress로 누적하고, 전체 재계산은 이 함수 하나로만 합니다.
+    """
+    goal, run = models.Goal, models.Run
+    rows = db.query(
+        goal.id,
+        goal.goal_type,
+        goal.target_value,
+        func.coalesce(func.sum(run.distance), 0),
+        func.count(run.id),
+        func.coalesce(func.sum(run.duration), 0)
+    ).outerjoin(run, and_(
+        run.user_id == goal.user_id,
+        run.date >= goal.start_date,
+        or_(goal.end_date.is_(None), run.date <= goal.end_date)
+    )).filter(*criteria).group_by(goal.id, goal.goal_type, goal.target_value).all()
+    
+    updates = []
+    for goal_id, goal_type, target_value, distance, run_count, duration in rows:
+        # 목표 타입에 따라 진행도 계산
+        if goal_type == "distance":
+            current_value = distance
+        elif goal_type == "runs":
+            current_value = run_count
+        elif goal_type == "time":
+            current_value = duration / 60  # 분 단위
+        else:
+            continue
+        updates.append({
+            "id": goal_id,
+            "current_value": current_value,
+            "is_completed": current_value >= target_value
+        })
+    
+    if updates:
+        db.execute(update(models.Goal), updates)
+
+def expire_goals(db: Session, now: datetime = None):
+    """
+    기간이 끝난 목표 종료 처리 및 반복 목표의 다음 기간 목표 생성 (스케줄러에서 호출)
+    
+    GOAL_EXPIRE_BATCH_SIZE개씩 조건부 UPDATE ... RETURNING으로 종료하므로 여러
+    프로세스가 동시에 실행해도 같은 목표의 다음 기간이 두 번 만들어지지 않습니다.
+    다음 기간은 이전 종료 시각부터 시작하며, 오래 멈춰 있었다면 현재 시각이 속한
+    기간으로 건너뜁니다. 새 목표의 진행도는 그 기간의 기존 기록으로 채웁니다.
+    
+    Returns:
+        (종료한 목표 수, 새로 만든 목표 수)
+    """
+    now = now or datetime.utcnow()
+    goal = models.Goal
+    expired_count = created_count = 0
+    
+    while True:
+        batch = select(goal.id).where(
+            goal.is_expired == False,
+            goal.end_date <= now
+        ).order_by(goal.id).limit(GOAL_EXPIRE_BATCH_SIZE)
+        expired = db.execute(
+            update(goal)
+            .where(goal.id.in_(batch), goal.is_expired == False)
+            .values(is_expired=True)
+            .returning(goal.user_id, goal.goal_type, goal.target_value, goal.period, goal.end_date, goal.is_recurring)
+            .execution_options(synchronize_session=False)
+        ).all()
         
-        if goal.end_date:
-            runs = runs.filter(models.Run.date <= goal.end_date)
-        
-        runs = runs.all()
+        next_goals = []
+        for user_id, goal_type, target_value, period, end_date, is_recurring in expired:
+            length = PERIOD_LENGTHS.get(period)
+            if not is_recurring or length is None:
+                continue
+            start_date = end_date
+            while start_date + length <= now:
+                start_date += length
+            next_goals.append({
+                "user_id": user_id,
+                "goal_type": goal_type,
+                "target_value": target_value,
+                "current_value": 0.0,
+                "period": period,
+                "start_date": start_date,
+                "end_date": start_date + length,
+                "is_completed": False,
+                "is_recurring": True,
+                "is_expired": False
+            })
         
-        # 목표 타입에 따라 진행도 계산
-        if goal.goal_type == "distance":
-            goal.current_value = sum(run.distance for run in runs)
-        elif goal.goal_type == "runs":
-            goal.current_value = len(runs)
-        elif goal.goal_type == "time":
-            goal.current_value = sum(run.duration for run in runs) / 60  # 분 단위
+        if next_goals:
+            new_ids = db.scalars(insert(goal).returning(goal.id), next_goals).all()
+            _recompute_goals(db, goal.id.in_(new_ids))
+        db.commit()
         
-        # 목표 달성 확인
-        if goal.current_value >= goal.target_value:
-            goal.is_completed = True
-    
-    db.commit()
+        expired_count += len(expired)
+        created_count += len(next_goals)
+        if len(expired) < GOAL_EXPIRE_BATCH_SIZE:
+            return expired_count, created_count
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from sqlalchemy import update, select, func, case, cast, Integer
 from sqlalchemy.orm import Session
 import os
 from pathlib import Path
@@ -131,3 +132,104 @@ async def upload_avatar(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"업로드에 실패했습니다: {str(e)}")
+
+# --- 프로필 누적 통계 --- #
+
+def _level_expr(total_distance, db: Session):
+    """레벨 = floor(누적 거리 / 10) + 1 (SQLite는 floor 대신 정수 변환 사용)"""
+    if db.bind.dialect.name == "sqlite":
+        return cast(total_distance / 10, Integer) + 1
+    return cast(func.floor(total_distance / 10), Integer) + 1
+
+def increment_profile_stats(user_id: int, db: Session, distance: float, runs: int = 1, longest_run: float = None, best_pace: float = 0.0):
+    """
+    새 러닝 기록을 프로필 누적 통계에 반영 (단일 UPDATE 문)
+    
+    읽고-수정-쓰기 대신 DB가 현재 값을 기준으로 갱신하므로 동시에 여러 기록이
+    저장돼도 값이 유실되지 않습니다. 커밋은 호출한 쪽에서 합니다.
+    
+    Args:
+        distance: 추가할 거리 합계 (km)
+        runs: 추가할 러닝 횟수
+        longest_run: 추가 기록 중 최장 거리 (기본값: distance)
+        best_pace: 추가 기록 중 0보다 큰 최고 페이스 (없으면 0)
+    """
+    if longest_run is None:
+        longest_run = distance
+    
+    profile = models.UserProfile
+    # 기존 로직과 동일: 최고 페이스가 없거나(0) 더 빠른 페이스가 들어오면 교체
+    if best_pace > 0:
+        replace_pace = (profile.best_pace == 0) | (profile.best_pace > best_pace)
+    else:
+        replace_pace = profile.best_pace == 0
+    
+    db.execute(
+        update(profile)
+        .where(profile.user_id == user_id)
+        .values(
+            total_distance=profile.total_distance + distance,
+            total_runs=profile.total_runs + runs,
+            longest_run=case((profile.longest_run < longest_run, longest_run), else_=profile.longest_run),
+            best_pace=case((replace_pace, best_pace), else_=profile.best_pace),
+            level=_level_expr(profile.total_distance + distance, db)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def rebuild_profile_stats(db: Session, batch_size: int = 500) -> int:
+    """
+    runs 테이블로부터 모든 프로필 누적 통계를 다시 계산
+    
+    사용자 batch_size명마다 GROUP BY 쿼리 한 번과 일괄 UPDATE 한 번을 실행합니다.
+    갱신한 프로필 수를 반환합니다.
+    """
+    Run = models.Run
+    updated = 0
+    last_id = 0
+    
+    while True:
+        profiles = db.execute(
+            select(models.UserProfile.id, models.UserProfile.user_id)
+            .where(models.UserProfile.id > last_id)
+            .order_by(models.UserProfile.id)
+            .limit(batch_size)
+        ).all()
+        if not profiles:
+            break
+        last_id = profiles[-1].id
+        
+        user_ids = [p.user_id for p in profiles]
+        stats = {
+            row.user_id: row
+            for row in db.execute(
+                select(
+                    Run.user_id,
+                    func.coalesce(func.sum(Run.distance), 0.0).label("total_distance"),
+                    func.count(Run.id).label("total_runs"),
+                    func.coalesce(func.max(Run.distance), 0.0).label("longest_run"),
+                    func.coalesce(func.min(case((Run.pace > 0, Run.pace))), 0.0).label("best_pace")
+                )
+                .where(Run.user_id.in_(user_ids))
+                .group_by(Run.user_id)
+            )
+        }
+        
+        rows = []
+        for p in profiles:
+            row = stats.get(p.user_id)
+            total_distance = row.total_distance if row else 0.0
+            rows.append({
+                "id": p.id,
+                "total_distance": total_distance,
+                "total_runs": row.total_runs if row else 0,
+                "longest_run": row.longest_run if row else 0.0,
+                "best_pace": row.best_pace if row else 0.0,
+                "level": int(total_distance / 10) + 1
+            })
+        
+        db.execute(update(models.UserProfile), rows)
+        db.commit()
+        updated += len(rows)
+    
+    return updated
@@ -1,16 +1,22 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
 import schemas
 import models
 from database import get_db
 from dependencies import get_current_user
 
-# 업적 및 목표 관련 함수 임포트
-from .goals import update_goal_progress
-from .achievements import check_and_unlock_achievements
-from .challenges import update_challenge_progress
+from .profiles import increment_profile_stats
+from .goals import increment_goal_progress
+# 업적/챌린지 갱신은 후처리 파이프라인에서 비동기로 처리합니다.
+from services.run_events import record_run_event, run_event_pipeline
+from services.achievement_catalog import achievement_catalog
+from services.route_codec import encode_route, decode_route
 
 router = APIRouter(
     prefix="/api/runs",
@@ -20,36 +26,197 @@ router = APIRouter(
 @router.post("", response_model=schemas.Run, status_code=201)
 def create_run(run: schemas.RunCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     """러닝 기록 저장"""
+    # 같은 client_id로 다시 보낸 요청이면 이미 저장된 기록을 그대로 반환합니다.
+    existing = _run_by_client_id(current_user.id, run.client_id, db)
+    if existing:
+        return existing
+    
     db_run = models.Run(**run.dict(), user_id=current_user.id)
     db.add(db_run)
+    try:
+        db.flush()
+    except IntegrityError:
+        # 같은 client_id로 동시에 들어온 재시도가 먼저 저장했습니다 (uq_runs_user_client_id).
+        # 이 트랜잭션의 첫 쓰기이므로 되돌려도 잃는 것이 없습니다.
+        db.rollback()
+        existing = _run_by_client_id(current_user.id, run.client_id, db)
+        if existing is None:
+            raise
+        return existing
     
-    # 프로필 업데이트
-    profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
-    if profile:
-        profile.total_distance += run.distance
-        profile.total_runs += 1
-        if run.distance > profile.longest_run:
-            profile.longest_run = run.distance
-        if profile.best_pace == 0 or (run.pace > 0 and run.pace < profile.best_pace):
-            profile.best_pace = run.pace
-        profile.level = int(profile.total_distance / 10) + 1
+    # 프로필 업데이트 (DB에서 원자적으로 누적)
+    increment_profile_stats(current_user.id, db, distance=run.distance, best_pace=run.pace)
+    # 목표 진행도도 같은 트랜잭션에서 누적합니다.
+    increment_goal_progress(current_user.id, db, [(db_run.date, db_run.distance, db_run.duration)])
     
+    # 기록과 후처리 이벤트를 한 트랜잭션으로 저장한 뒤 바로 응답합니다.
+    event = record_run_event(db, current_user.id, db_run.id)
     db.commit()
+    run_event_pipeline.enqueue(event.id, current_user.id)
     
-    # 연관된 기능들 업데이트
-    update_goal_progress(current_user.id, db)
-    newly_unlocked = check_and_unlock_achievements(current_user.id, db)
-    update_challenge_progress(current_user.id, db)
-    
+    # 새로 달성한 업적은 GET /api/runs/{run_id}/unlocks 로 조회합니다.
     db.refresh(db_run)
-    
-    # 새로 달성한 업적 정보를 응답에 포함 (선택적)
-    # 이 부분을 위해서는 Run 스키마에 `newly_unlocked_achievements` 필드가 추가되어야 합니다.
-    # 여기서는 간단하게 러닝 기록만 반환합니다.
     return db_run
 
-@router.get("", response_model=List[schemas.Run])
-def get_runs(skip: int = 0, limit: int = 100, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """러닝 기록 조회"""
-    runs = db.query(models.Run).filter(models.Run.user_id == current_user.id).order_by(models.Run.date.desc()).offset(skip).limit(limit).all()
-    return runs
+def _run_by_client_id(user_id: int, client_id: Optional[str], db: Session):
+    """client_id로 이미 저장된 기록 (없거나 client_id가 없으면 None)"""
+    if not client_id:
+        return None
+    return db.query(models.Run).filter(
+        models.Run.user_id == user_id,
+        models.Run.client_id == client_id
+    ).first()
+
+MAX_BULK_RUNS = 500  # 한 번에 업로드할 수 있는 최대 기록 수
+
+@router.post("/bulk", response_model=schemas.RunBulkResult, status_code=201)
+def create_runs_bulk(payload: schemas.RunBulkCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    러닝 기록 일괄 저장 (오프라인 저장분 동기화)
+    
+    client_id가 이미 저장된 기록은 건너뛰므로 같은 요청을 다시 보내도 안전합니다.
+    목표는 기록마다 누적하고, 업적/챌린지는 요청당 한 번만 갱신합니다.
+    새로 달성한 업적은 마지막 기록의 GET /api/runs/{run_id}/unlocks 로 조회합니다.
+    """
+    if len(payload.runs) > MAX_BULK_RUNS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {MAX_BULK_RUNS}개까지 업로드할 수 있습니다")
+    
+    # 같은 요청 안에서 중복된 client_id는 처음 것만 사용합니다.
+    unique_runs = {}
+    for run in payload.runs:
+        unique_runs.setdefault(run.client_id, run)
+    
+    now = datetime.utcnow()
+    rows = [
+        {**run.dict(exclude={"date", "route"}), "date": run.date or now, "user_id": current_user.id}
+        for run in unique_runs.values()
+    ]
+    
+    inserted = {}
+    if rows:
+        # 여러 행을 INSERT 한 번으로 저장하고, 이미 있는 (user_id, client_id)는 무시합니다.
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        stmt = (
+            dialect.insert(models.Run)
+            .on_conflict_do_nothing(index_elements=["user_id", "client_id"])
+            .returning(models.Run.id, models.Run.client_id)
+        )
+        inserted = {row.client_id: row.id for row in db.execute(stmt, rows)}
+    
+    # 새로 저장된 기록의 경로는 압축해서 run_routes에 한 번에 저장합니다.
+    route_rows = []
+    for client_id, run_id in inserted.items():
+        route = unique_runs[client_id].route
+        if route is not None:
+            encoding, point_count, data = encode_route(route)
+            route_rows.append({"run_id": run_id, "encoding": encoding, "point_count": point_count, "data": data})
+    if route_rows:
+        db.execute(insert(models.RunRoute), route_rows)
+    
+    new_runs = [unique_runs[client_id] for client_id in inserted]
+    event = None
+    if new_runs:
+        positive_paces = [run.pace for run in new_runs if run.pace > 0]
+        increment_profile_stats(
+            current_user.id, db,
+            distance=sum(run.distance for run in new_runs),
+            runs=len(new_runs),
+            longest_run=max(run.distance for run in new_runs),
+            best_pace=min(positive_paces, default=0.0)
+        )
+        increment_goal_progress(current_user.id, db, sorted(
+            (row["date"], row["distance"], row["duration"])
+            for row in rows if row["client_id"] in inserted
+        ))
+        # 요청 전체에 대해 후처리 이벤트 하나만 만듭니다.
+        event = record_run_event(
+            db, current_user.id, max(inserted.values()),
+            event_type="runs_imported", run_ids=sorted(inserted.values())
+        )
+    db.commit()
+    
+    if event is not None:
+        run_event_pipeline.enqueue(event.id, current_user.id)
+    
+    return {
+        "inserted": len(inserted),
+        "duplicates": len(payload.runs) - len(inserted),
+        "run_ids": inserted,
+        "event_id": event.id if event is not None else None
+    }
+
+# GET /api/runs 의 fields로 고를 수 있는 값 (route는 요청할 때만 run_routes에서 읽음)
+RUN_LIST_FIELDS = ("id", "user_id", "date", "distance", "duration", "pace", "calories", "weather", "client_id", "route")
+DEFAULT_RUN_LIST_FIELDS = tuple(field for field in RUN_LIST_FIELDS if field != "route")
+
+@router.get("", response_model=List[schemas.RunListItem], response_model_exclude_unset=True)
+def get_runs(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    러닝 기록 조회
+    
+    fields에 쉼표로 구분한 값만 돌려줍니다 (예: fields=date,distance,pace, id는 항상 포함).
+    생략하면 GPS 경로를 뺀 모든 값을 돌려주고, 경로는 fields에 route를 넣거나
+    GET /api/runs/{run_id}/route 로 조회합니다.
+    """
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in RUN_LIST_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"알 수 없는 필드입니다: {', '.join(unknown)}")
+    else:
+        selected = list(DEFAULT_RUN_LIST_FIELDS)
+    columns = ["id"] + [field for field in selected if field not in ("id", "route")]
+    
+    rows = db.query(*(getattr(models.Run, column) for column in columns)).filter(
+        models.Run.user_id == current_user.id
+    ).order_by(models.Run.date.desc()).offset(skip).limit(limit).all()
+    items = [dict(zip(columns, row)) for row in rows]
+    
+    if "route" in selected and items:
+        # 이 페이지의 경로만 한 번에 읽습니다.
+        routes = {
+            run_id: decode_route(encoding, data)
+            for run_id, encoding, data in db.query(
+                models.RunRoute.run_id, models.RunRoute.encoding, models.RunRoute.data
+            ).filter(models.RunRoute.run_id.in_([item["id"] for item in items]))
+        }
+        for item in items:
+            item["route"] = routes.get(item["id"])
+    
+    return items
+
+@router.get("/{run_id}/route", response_model=schemas.RunRoute)
+def get_run_route(run_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """러닝 기록 하나의 GPS 경로"""
+    row = db.query(models.RunRoute.encoding, models.RunRoute.point_count, models.RunRoute.data).select_from(models.Run).outerjoin(
+        models.RunRoute, models.RunRoute.run_id == models.Run.id
+    ).filter(
+        models.Run.id == run_id,
+        models.Run.user_id == current_user.id
+    ).first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="러닝 기록을 찾을 수 없습니다")
+    if row.encoding is None:
+        return {"run_id": run_id, "point_count": 0, "route": None}
+    return {"run_id": run_id, "point_count": row.point_count, "route": decode_route(row.encoding, row.data)}
+
+@router.get("/{run_id}/unlocks", response_model=schemas.RunUnlocks)
+def get_run_unlocks(run_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """러닝 기록 후처리 상태와 그 결과 새로 달성한 업적"""
+    event = db.query(models.RunEvent).filter(
+        models.RunEvent.run_id == run_id,
+        models.RunEvent.user_id == current_user.id
+    ).order_by(models.RunEvent.id.desc()).first()
+    
+    if not event:
+        raise HTTPException(status_code=404, detail="러닝 기록 처리 내역을 찾을 수 없습니다")
+    
+    achievements = achievement_catalog.by_ids(db, event.unlocked_achievement_ids or [])
+    return {"run_id": run_id, "status": event.status, "achievements": achievements}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 # User Schemas
@@ -70,7 +70,20 @@ class RunBase(BaseModel):
     weather: Optional[str] = None
 
 class RunCreate(RunBase):
-    pass
+    client_id: Optional[str] = None  # 오프라인 동기화용 멱등 키
+
+class RunBulkItem(RunBase):
+    client_id: str
+    date: Optional[datetime] = None  # 실제로 달린 시각 (없으면 업로드 시각)
+
+class RunBulkCreate(BaseModel):
+    runs: List[RunBulkItem]
+
+class RunBulkResult(BaseModel):
+    inserted: int
+    duplicates: int
+    run_ids: Dict[str, int]  # client_id -> 이번에 저장된 러닝 기록 id
+    event_id: Optional[int] = None  # 후처리 이벤트 (새 기록이 없으면 None)
 
 class Run(RunBase):
     id: int
@@ -80,14 +93,37 @@ class Run(RunBase):
     class Config:
         from_attributes = True
 
+class RunListItem(BaseModel):
+    """러닝 기록 목록 항목 (fields로 고른 값만 포함, 기본은 경로 제외)"""
+    id: int
+    user_id: Optional[int] = None
+    date: Optional[datetime] = None
+    distance: Optional[float] = None
+    duration: Optional[int] = None
+    pace: Optional[float] = None
+    calories: Optional[int] = None
+    weather: Optional[str] = None
+    client_id: Optional[str] = None
+    route: Optional[List[dict]] = None
+
+class RunRoute(BaseModel):
+    run_id: int
+    point_count: int
+    route: Optional[List[dict]] = None  # 경로가 없으면 None
+
 # Weather Schema
 class WeatherResponse(BaseModel):
-    temperature: float
+    temperature: Optional[float] = None
     condition: str
-    humidity: int
-    wind_speed: float
-    is_good_for_running: bool
+    humidity: Optional[int] = None
+    wind_speed: Optional[float] = None
+    precipitation: Optional[float] = None
+    precipitation_probability: Optional[int] = None
+    is_good_for_running: Optional[bool] = None
     recommendation: str
+    is_stale: bool = False  # 기상청 장애로 지난 예보(또는 정보 없음)를 반환한 경우
+    forecast_base_time: Optional[str] = None  # 예보 발표 시각 (YYYYMMDDHHMM)
+    forecast_time: Optional[str] = None  # 예보 대상 시각 (YYYYMMDDHHMM)
 
 # Indoor Facility Schema
 class IndoorFacilityBase(BaseModel):
@@ -142,6 +178,7 @@ class GoalBase(BaseModel):
     goal_type: str
     target_value: float
     period: str
+    is_recurring: bool = False  # 기간이 끝나면 다음 기간 목표 자동 생성
 
 class GoalCreate(GoalBase):
     pass
@@ -153,6 +190,7 @@ class Goal(GoalBase):
     start_date: datetime
     end_date: Optional[datetime] = None
     is_completed: bool
+    is_expired: bool = False
     
     class Config:
         from_attributes = True
@@ -172,6 +210,11 @@ class Achievement(AchievementBase):
     class Config:
         from_attributes = True
 
+class RunUnlocks(BaseModel):
+    run_id: int
+    status: str  # pending, processing, done, failed
+    achievements: List[Achievement]
+
 class UserAchievement(BaseModel):
     id: int
     achievement: Achievement
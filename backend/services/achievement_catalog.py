@@ -0,0 +1,120 @@
+"""
+업적 목록 캐시
+
+업적 목록은 init_achievements.py를 실행할 때만 바뀌므로 프로세스 메모리에 한 번
+읽어 두고, catalog_versions 테이블의 버전이 바뀌었을 때만 다시 읽습니다.
+requirement_type별로 기준값을 정렬해 두어 "누적 거리 123.4km로 달성한 업적"을
+이분 탐색 한 번으로 찾습니다.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+import models
+from database import SessionLocal
+
+ACHIEVEMENT_CATALOG = "achievements"
+CATALOG_CHECK_INTERVAL = float(os.getenv("ACHIEVEMENT_CATALOG_CHECK_INTERVAL", "30"))  # 버전 확인 주기(초)
+
+class AchievementCatalog:
+    """
+    업적 목록과 유형별 정렬된 기준값 색인
+
+    캐시한 업적은 세션에서 분리된(detached) 객체이므로 읽기 전용으로만 사용합니다.
+    """
+    def __init__(self, check_interval: float = CATALOG_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._achievements = []
+        self._by_id = {}
+        self._index = {}  # requirement_type -> (정렬된 기준값 목록, 같은 순서의 업적 목록)
+
+    def version(self, db):
+        """현재 캐시한 업적 목록의 버전"""
+        self._ensure_fresh(db)
+        return self._version
+
+    def all(self, db):
+        """모든 업적 (id 순)"""
+        self._ensure_fresh(db)
+        return self._achievements
+
+    def get(self, db, achievement_id: int):
+        self._ensure_fresh(db)
+        return self._by_id.get(achievement_id)
+
+    def by_ids(self, db, achievement_ids):
+        """id 목록의 업적 (없는 id는 제외)"""
+        self._ensure_fresh(db)
+        return [self._by_id[i] for i in achievement_ids if i in self._by_id]
+
+    def reached(self, db, requirement_type: str, value: float):
+        """
+        값 value로 달성한 requirement_type 업적 목록 (pace는 기준값 이하로 달리면 달성)
+        """
+        self._ensure_fresh(db)
+        entry = self._index.get(requirement_type)
+        if entry is None:
+            return []
+        values, items = entry
+        if requirement_type == "pace":
+            if value <= 0:
+                return []
+            return items[bisect_left(values, value):]
+        return items[:bisect_right(values, value)]
+
+    def invalidate(self):
+        """다음 조회 때 버전을 다시 확인하도록 표시"""
+        self._checked_at = 0.0
+
+    def _ensure_fresh(self, db):
+        if self._version is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return
+            version = db.query(models.CatalogVersion.version).filter(
+                models.CatalogVersion.name == ACHIEVEMENT_CATALOG
+            ).scalar() or 0
+            if version != self._version:
+                self._load()
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    def _load(self):
+        # 호출한 쪽 세션의 객체를 분리하지 않도록 별도 세션으로 읽습니다.
+        db = SessionLocal()
+        try:
+            achievements = db.query(models.Achievement).order_by(models.Achievement.id).all()
+            db.expunge_all()
+        finally:
+            db.close()
+
+        index = {}
+        for achievement in sorted(achievements, key=lambda a: (a.requirement_value, a.id)):
+            values, items = index.setdefault(achievement.requirement_type, ([], []))
+            values.append(achievement.requirement_value)
+            items.append(achievement)
+
+        self._achievements = achievements
+        self._by_id = {achievement.id: achievement for achievement in achievements}
+        self._index = index
+        print(f"[Achievement Catalog] Loaded {len(achievements)} achievements")
+
+def bump_catalog_version(db, name: str = ACHIEVEMENT_CATALOG):
+    """
+    목록 버전 올리기 (업적을 추가/수정한 트랜잭션에서 호출, 커밋은 호출한 쪽에서)
+
+    다른 프로세스의 캐시는 CATALOG_CHECK_INTERVAL 안에 새 목록을 읽습니다.
+    """
+    row = db.get(models.CatalogVersion, name)
+    if row is None:
+        db.add(models.CatalogVersion(name=name, version=1))
+    else:
+        row.version += 1
+    achievement_catalog.invalidate()
+
+achievement_catalog = AchievementCatalog()
@@ -0,0 +1,62 @@
+import asyncio
+import os
+from datetime import timedelta
+
+from database import SessionLocal
+from routers.challenges import finalize_challenges, archive_challenges
+
+CHALLENGE_SCHEDULER_ENABLED = os.getenv("CHALLENGE_SCHEDULER_ENABLED", "true").lower() == "true"
+CHALLENGE_SCHEDULER_INTERVAL = int(os.getenv("CHALLENGE_SCHEDULER_INTERVAL_SECONDS", "300"))  # 실행 주기(초)
+# 마감 후 이 기간이 지나면 참가자 행을 보관 테이블로 옮깁니다 (0이면 보관하지 않음).
+CHALLENGE_ARCHIVE_AFTER_DAYS = int(os.getenv("CHALLENGE_ARCHIVE_AFTER_DAYS", "90"))
+
+class ChallengeScheduler:
+    """
+    종료일이 지난 챌린지를 주기적으로 마감(최종 순위 확정)하고 오래된 참가자 행을 보관하는 스케줄러
+    """
+    def __init__(self, interval: int = CHALLENGE_SCHEDULER_INTERVAL, archive_after_days: int = CHALLENGE_ARCHIVE_AFTER_DAYS):
+        self.interval = interval
+        self.archive_after_days = archive_after_days
+        self._task = None
+
+    def start(self):
+        """
+        백그라운드 작업 시작 (이미 실행 중이면 무시)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        백그라운드 작업 중지
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print(f"[Challenge Scheduler] Error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            finalized = finalize_challenges(db)
+            archived = 0
+            if self.archive_after_days > 0:
+                archived = archive_challenges(db, timedelta(days=self.archive_after_days))
+        finally:
+            db.close()
+        if finalized or archived:
+            print(f"[Challenge Scheduler] Finalized {finalized} challenges, archived {archived}")
+        return finalized, archived
+
+challenge_scheduler = ChallengeScheduler()
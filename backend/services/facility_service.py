@@ -58,18 +58,51 @@ class FacilityService:
             max_distance: 최대 거리 (km)
             weather_condition: 날씨 상태 (bad, rain, snow, dust)
         """
+        candidates = self.find_nearby_candidates(lat, lon, max_distance)
+        return self.filter_by_weather(candidates, weather_condition)
+    
+    def filter_by_weather(self, candidates: List[dict], weather_condition: str = "bad", limit: int = 10) -> List[dict]:
+        """
+        후보 시설 중 날씨 상태에 맞는 키워드의 시설만 거리순으로 반환
+        
+        find_nearby_candidates 결과를 받아 날씨가 정해진 뒤에 적용합니다.
+        """
+        keywords = self._keywords_for(weather_condition)
+        facilities = [f for f in candidates if any(keyword in f['name'] for keyword in keywords)]
+        print(f"[Facility Service] Returning {len(facilities[:limit])} facilities for weather '{weather_condition}'")
+        return facilities[:limit]
+    
+    def _keywords_for(self, weather_condition: str) -> List[str]:
+        """
+        날씨 상태별 실내 시설 키워드
+        """
+        # 실내 키워드 필터링 (더 넓은 범위)
+        indoor_keywords = ['실내', '체육관', '수영장', '배드민턴', '테니스', '헬스', '피트니스', '스포츠센터', '운동장', '체육시설']
+        
+        # 날씨에 따른 추가 키워드
+        if weather_condition == "rain" or weather_condition == "snow":
+            indoor_keywords.extend(['실내체육관', '실내수영장', '실내배드민턴장', '실내테니스장'])
+        elif weather_condition == "dust":
+            indoor_keywords.extend(['실내', '헬스장', '피트니스센터'])
+        
+        return indoor_keywords
+    
+    def find_nearby_candidates(self, lat: float, lon: float, max_distance: float = 5.0) -> List[dict]:
+        """
+        주변 실내 시설 후보 (모든 날씨 키워드 포함, 거리순)
+        
+        CSV 전체를 훑는 무거운 단계로, 날씨 조회와 동시에 실행할 수 있도록
+        날씨 상태와 무관하게 계산합니다.
+        """
         if self.facilities_df is None or self.facilities_df.empty:
             return self._get_dummy_facilities()
         
         try:
-            # 실내 키워드 필터링 (더 넓은 범위)
-            indoor_keywords = ['실내', '체육관', '수영장', '배드민턴', '테니스', '헬스', '피트니스', '스포츠센터', '운동장', '체육시설']
-            
-            # 날씨에 따른 추가 키워드
-            if weather_condition == "rain" or weather_condition == "snow":
-                indoor_keywords.extend(['실내체육관', '실내수영장', '실내배드민턴장', '실내테니스장'])
-            elif weather_condition == "dust":
-                indoor_keywords.extend(['실내', '헬스장', '피트니스센터'])
+            indoor_keywords = sorted({
+                keyword
+                for condition in ("bad", "rain", "snow", "dust")
+                for keyword in self._keywords_for(condition)
+            })
             
             print(f"[Facility Service] Searching for facilities with keywords: {indoor_keywords}")
             
@@ -166,9 +199,9 @@ class FacilityService:
             # 거리순 정렬
             facilities_with_distance.sort(key=lambda x: x['distance'])
             
-            print(f"[Facility Service] Returning {len(facilities_with_distance[:10])} facilities within {max_distance}km")
+            print(f"[Facility Service] Found {len(facilities_with_distance)} candidates within {max_distance}km")
             
-            return facilities_with_distance[:10]  # 상위 10개만 반환
+            return facilities_with_distance
             
         except Exception as e:
             print(f"Error getting facilities: {e}")
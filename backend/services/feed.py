@@ -0,0 +1,180 @@
+"""
+친구 활동 피드 (fan-out-on-write)
+
+러닝 기록이 저장되면 후처리 파이프라인이 기록 요약을 수락된 친구 각각의 타임라인
+(feed_entries)에 복사해 둡니다. 피드를 열 때는 내 타임라인만 (run_date, id) 역순으로
+범위 조회하며, 타임라인은 사용자당 FEED_MAX_ENTRIES개까지만 유지합니다.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, delete, func, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+import models
+
+FEED_MAX_ENTRIES = 200  # 사용자별 타임라인 최대 길이
+FEED_COLUMNS = ["owner_id", "run_id", "author_id", "distance", "duration", "pace", "run_date"]
+
+def _insert(db):
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(models.FeedEntry)
+
+def fan_out_runs(db, run_ids) -> int:
+    """
+    러닝 기록들을 작성자의 친구 타임라인에 추가 (INSERT ... SELECT 한 번, 커밋은 호출한 쪽에서)
+
+    이미 들어간 (타임라인, 기록)은 건너뛰므로 재시도해도 안전합니다.
+
+    Returns:
+        추가한 항목 수
+    """
+    if not run_ids:
+        return 0
+    run, edge = models.Run, models.FriendEdge
+    source = select(
+        edge.friend_id, run.id, run.user_id, run.distance, run.duration, run.pace, run.date
+    ).join(edge, edge.user_id == run.user_id).where(run.id.in_(run_ids))
+
+    inserted = db.execute(
+        _insert(db)
+        .from_select(FEED_COLUMNS, source)
+        .on_conflict_do_nothing(index_elements=["owner_id", "run_id"])
+        .returning(models.FeedEntry.owner_id)
+    ).all()
+    trim_timelines(db, {owner_id for (owner_id,) in inserted})
+    return len(inserted)
+
+def trim_timelines(db, owner_ids, max_entries: int = FEED_MAX_ENTRIES):
+    """
+    타임라인마다 최근 max_entries개만 남기고 삭제 (커밋은 호출한 쪽에서)
+    """
+    feed = models.FeedEntry
+    for owner_id in owner_ids:
+        cutoff = db.execute(
+            select(feed.run_date, feed.id)
+            .where(feed.owner_id == owner_id)
+            .order_by(feed.run_date.desc(), feed.id.desc())
+            .offset(max_entries)
+            .limit(1)
+        ).first()
+        if cutoff is not None:
+            db.execute(
+                delete(feed)
+                .where(feed.owner_id == owner_id, tuple_(feed.run_date, feed.id) <= tuple(cutoff))
+                .execution_options(synchronize_session=False)
+            )
+
+def remove_friend_entries(db, user_id: int, friend_id: int):
+    """
+    친구 삭제 시 서로의 타임라인에서 상대 기록 제거 (커밋은 호출한 쪽에서)
+    """
+    feed = models.FeedEntry
+    db.execute(
+        delete(feed)
+        .where(tuple_(feed.owner_id, feed.author_id).in_([(user_id, friend_id), (friend_id, user_id)]))
+        .execution_options(synchronize_session=False)
+    )
+
+def read_feed(db, owner_id: int, cursor: str = None, limit: int = 20):
+    """
+    타임라인 한 페이지 (최신순)
+
+    Args:
+        cursor: 이전 페이지의 next_cursor (없으면 처음부터)
+
+    Returns:
+        (항목 목록, 다음 페이지 cursor 또는 None)
+
+    Raises:
+        ValueError: cursor 형식이 잘못된 경우
+    """
+    feed = models.FeedEntry
+    query = db.query(
+        feed.id,
+        feed.run_id,
+        feed.author_id,
+        models.User.username,
+        models.UserProfile.avatar_url,
+        feed.distance,
+        feed.duration,
+        feed.pace,
+        feed.run_date
+    ).join(
+        models.User, models.User.id == feed.author_id
+    ).outerjoin(
+        models.UserProfile, models.UserProfile.user_id == feed.author_id
+    ).filter(feed.owner_id == owner_id)
+
+    if cursor:
+        run_date, entry_id = _decode_cursor(cursor)
+        query = query.filter(tuple_(feed.run_date, feed.id) < (run_date, entry_id))
+
+    rows = query.order_by(feed.run_date.desc(), feed.id.desc()).limit(limit + 1).all()
+    items = [
+        {
+            "run_id": run_id,
+            "user_id": author_id,
+            "username": username,
+            "avatar_url": avatar_url,
+            "distance": distance,
+            "duration": duration,
+            "pace": pace,
+            "date": run_date
+        }
+        for _, run_id, author_id, username, avatar_url, distance, duration, pace, run_date in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f"{last.run_date.isoformat()}_{last.id}"
+    return items, next_cursor
+
+def _decode_cursor(cursor: str):
+    run_date, _, entry_id = cursor.rpartition("_")
+    return datetime.fromisoformat(run_date), int(entry_id)
+
+def backfill_feeds(db, batch_size: int = 500, per_user: int = FEED_MAX_ENTRIES) -> int:
+    """
+    기존 러닝 기록으로 모든 사용자의 타임라인 채우기
+
+    사용자 batch_size명마다 친구들의 최근 per_user개 기록을 ROW_NUMBER로 골라
+    INSERT ... SELECT 한 번으로 넣고 커밋합니다. 이미 있는 항목은 건너뜁니다.
+
+    Returns:
+        처리한 사용자 수
+    """
+    run, edge, feed = models.Run, models.FriendEdge, models.FeedEntry
+    last_user_id = 0
+    total = 0
+
+    while True:
+        owner_ids = db.scalars(
+            select(models.User.id).where(models.User.id > last_user_id).order_by(models.User.id).limit(batch_size)
+        ).all()
+        if not owner_ids:
+            return total
+
+        ranked = select(
+            edge.user_id.label("owner_id"),
+            run.id.label("run_id"),
+            run.user_id.label("author_id"),
+            run.distance,
+            run.duration,
+            run.pace,
+            run.date.label("run_date"),
+            func.row_number().over(
+                partition_by=edge.user_id,
+                order_by=(run.date.desc(), run.id.desc())
+            ).label("position")
+        ).join(run, run.user_id == edge.friend_id).where(edge.user_id.in_(owner_ids)).subquery()
+
+        db.execute(
+            _insert(db)
+            .from_select(FEED_COLUMNS, select(*(ranked.c[column] for column in FEED_COLUMNS)).where(ranked.c.position <= per_user))
+            .on_conflict_do_nothing(index_elements=["owner_id", "run_id"])
+        )
+        trim_timelines(db, owner_ids, per_user)
+        db.commit()
+
+        total += len(owner_ids)
+        last_user_id = owner_ids[-1]
@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+from database import SessionLocal
+from routers.goals import expire_goals
+
+GOAL_SCHEDULER_ENABLED = os.getenv("GOAL_SCHEDULER_ENABLED", "true").lower() == "true"
+GOAL_SCHEDULER_INTERVAL = int(os.getenv("GOAL_SCHEDULER_INTERVAL_SECONDS", "300"))  # 실행 주기(초)
+
+class GoalScheduler:
+    """
+    기간이 끝난 목표를 주기적으로 종료하고 반복 목표의 다음 기간을 만드는 스케줄러
+    """
+    def __init__(self, interval: int = GOAL_SCHEDULER_INTERVAL):
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        """
+        백그라운드 작업 시작 (이미 실행 중이면 무시)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        백그라운드 작업 중지
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print(f"[Goal Scheduler] Error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            expired, created = expire_goals(db)
+        finally:
+            db.close()
+        if expired:
+            print(f"[Goal Scheduler] Expired {expired} goals, created {created} next-period goals")
+        return expired, created
+
+goal_scheduler = GoalScheduler()
@@ -0,0 +1,142 @@
+"""
+위경도 -> 기상청 격자 좌표 변환 (Lambert Conformal Conic)
+
+투영 상수는 모듈 로드 시 한 번만 계산합니다.
+WEATHER_GRID_LOOKUP=true이면 한반도 영역을 미리 계산한 래스터에서
+배열 인덱스 한 번으로 격자를 찾습니다. 래스터는 앱 시작 시(main.py lifespan)
+스레드에서 만들며, 만들어지기 전에는 직접 계산합니다.
+"""
+import math
+import os
+
+import numpy as np
+
+RE = 6371.00877  # 지구 반경(km)
+GRID = 5.0  # 격자 간격(km)
+SLAT1 = 30.0  # 표준위도1
+SLAT2 = 60.0  # 표준위도2
+OLON = 126.0  # 기준점 경도
+OLAT = 38.0  # 기준점 위도
+XO = 43  # 기준점 X좌표
+YO = 136  # 기준점 Y좌표
+
+DEGRAD = math.pi / 180.0
+
+# --- 투영 상수 (한 번만 계산) --- #
+
+_re = RE / GRID
+_slat1 = SLAT1 * DEGRAD
+_slat2 = SLAT2 * DEGRAD
+_olon = OLON * DEGRAD
+_olat = OLAT * DEGRAD
+
+SN = math.log(math.cos(_slat1) / math.cos(_slat2)) / math.log(
+    math.tan(math.pi * 0.25 + _slat2 * 0.5) / math.tan(math.pi * 0.25 + _slat1 * 0.5)
+)
+SF = math.pow(math.tan(math.pi * 0.25 + _slat1 * 0.5), SN) * math.cos(_slat1) / SN
+RO = _re * SF / math.pow(math.tan(math.pi * 0.25 + _olat * 0.5), SN)
+
+# --- 조회 래스터 설정 (한반도 영역) --- #
+
+GRID_LOOKUP_ENABLED = os.getenv("WEATHER_GRID_LOOKUP", "false").lower() == "true"
+LOOKUP_LAT_MIN, LOOKUP_LAT_MAX = 33.0, 39.0
+LOOKUP_LON_MIN, LOOKUP_LON_MAX = 124.0, 132.0
+LOOKUP_STEP = 0.005  # 래스터 간격(도), 약 500m
+
+def latlon_to_grid(lat: float, lon: float):
+    """
+    위경도 하나를 격자 좌표 (nx, ny)로 변환
+    """
+    if GRID_LOOKUP_ENABLED:
+        cell = grid_lookup.lookup(lat, lon)
+        if cell is not None:
+            return cell
+
+    ra = _re * SF / math.pow(math.tan(math.pi * 0.25 + lat * DEGRAD * 0.5), SN)
+    theta = lon * DEGRAD - _olon
+    if theta > math.pi:
+        theta -= 2.0 * math.pi
+    if theta < -math.pi:
+        theta += 2.0 * math.pi
+    theta *= SN
+
+    x = math.floor(ra * math.sin(theta) + XO + 0.5)
+    y = math.floor(RO - ra * math.cos(theta) + YO + 0.5)
+
+    return int(x), int(y)
+
+def latlon_to_grid_batch(lats, lons):
+    """
+    위경도 배열을 격자 좌표 배열 (nx, ny)로 일괄 변환 (래스터 계산용)
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    ra = _re * SF / np.power(np.tan(math.pi * 0.25 + lats * DEGRAD * 0.5), SN)
+    theta = lons * DEGRAD - _olon
+    theta = np.where(theta > math.pi, theta - 2.0 * math.pi, theta)
+    theta = np.where(theta < -math.pi, theta + 2.0 * math.pi, theta)
+    theta *= SN
+
+    x = np.floor(ra * np.sin(theta) + XO + 0.5).astype(np.int32)
+    y = np.floor(RO - ra * np.cos(theta) + YO + 0.5).astype(np.int32)
+
+    return x, y
+
+class GridLookup:
+    """
+    한반도 영역을 LOOKUP_STEP 간격의 픽셀로 나눠 미리 변환해 둔 래스터
+
+    픽셀의 네 꼭짓점이 모두 같은 격자에 속할 때만 그 격자를 저장하고,
+    격자 경계에 걸친 픽셀과 영역 밖 좌표는 직접 계산하므로 결과는 항상
+    latlon_to_grid의 계산값과 같습니다.
+    """
+    def __init__(self):
+        self._cells = None
+        self._rows = int(round((LOOKUP_LAT_MAX - LOOKUP_LAT_MIN) / LOOKUP_STEP))
+        self._cols = int(round((LOOKUP_LON_MAX - LOOKUP_LON_MIN) / LOOKUP_STEP))
+
+    def build(self):
+        """
+        래스터 계산 (약 190만 픽셀, 한 번만 실행)
+
+        CPU를 오래 쓰므로 이벤트 루프에서는 asyncio.to_thread로 호출하세요.
+        """
+        if self._cells is not None:
+            return
+        lats = LOOKUP_LAT_MIN + np.arange(self._rows + 1) * LOOKUP_STEP
+        lons = LOOKUP_LON_MIN + np.arange(self._cols + 1) * LOOKUP_STEP
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+        nx, ny = latlon_to_grid_batch(lat_grid, lon_grid)
+        # 격자를 nx * 1000 + ny 하나의 정수로 묶어 저장합니다.
+        corners = nx * 1000 + ny
+
+        cells = corners[:-1, :-1].copy()
+        same = (
+            (cells == corners[1:, :-1]) &
+            (cells == corners[:-1, 1:]) &
+            (cells == corners[1:, 1:])
+        )
+        cells[~same] = -1
+        self._cells = cells
+        print(f"[KMA Grid] Built lookup raster {self._rows}x{self._cols} ({same.mean():.0%} resolved)")
+
+    def lookup(self, lat: float, lon: float):
+        """
+        위경도 하나의 격자 좌표 (래스터가 아직 없거나 래스터로 정할 수 없으면 None)
+
+        요청 처리 중에 래스터를 만들지 않습니다 (이벤트 루프를 막지 않도록).
+        """
+        cells = self._cells
+        if cells is None:
+            return None
+        row = math.floor((lat - LOOKUP_LAT_MIN) / LOOKUP_STEP)
+        col = math.floor((lon - LOOKUP_LON_MIN) / LOOKUP_STEP)
+        if not (0 <= row < self._rows and 0 <= col < self._cols):
+            return None
+        cell = int(cells[row, col])
+        if cell < 0:
+            return None
+        return cell // 1000, cell % 1000
+
+grid_lookup = GridLookup()
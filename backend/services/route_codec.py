@@ -0,0 +1,90 @@
+"""
+러닝 경로(GPS 좌표 목록) 압축 저장 형식
+
+[{"latitude": .., "longitude": .., "timestamp": ..}, ...] 형태의 경로를 위경도는
+1e-7도(약 1cm) 단위 정수, 시각은 밀리초 정수로 바꾼 뒤 이전 점과의 차이(int32)만
+저장하고 zlib으로 압축합니다. 그 밖의 키가 있거나 숫자가 아닌 값이 섞인 경로는
+원래 모양을 그대로 돌려줄 수 있도록 JSON을 압축해 저장합니다.
+"""
+import json
+import struct
+import zlib
+
+import numpy as np
+
+ENCODING_DELTA = "delta-v1"
+ENCODING_JSON = "json-zlib"
+
+COORD_SCALE = 10_000_000  # 1e-7도 단위
+_HEADER = struct.Struct("<BIq")  # 시각 포함 여부, 점 개수, 첫 시각(ms)
+_DELTA_KEYS = ({"latitude", "longitude"}, {"latitude", "longitude", "timestamp"})
+_INT32 = np.iinfo(np.int32)
+
+def encode_route(points):
+    """
+    경로 -> (encoding, 점 개수, 압축 바이트)
+    """
+    points = points or []
+    if _can_delta_encode(points):
+        has_time = "timestamp" in points[0]
+        lats = np.round(np.array([p["latitude"] for p in points], dtype=np.float64) * COORD_SCALE).astype(np.int64)
+        lons = np.round(np.array([p["longitude"] for p in points], dtype=np.float64) * COORD_SCALE).astype(np.int64)
+        columns = [_deltas(lats), _deltas(lons)]
+        first_time = 0
+        if has_time:
+            times = np.round(np.array([p["timestamp"] for p in points], dtype=np.float64)).astype(np.int64)
+            first_time = int(times[0])
+            times -= first_time
+            columns.append(_deltas(times))
+
+        if all(column is not None for column in columns):
+            body = b"".join(column.astype("<i4").tobytes() for column in columns)
+            data = _HEADER.pack(1 if has_time else 0, len(points), first_time) + body
+            return ENCODING_DELTA, len(points), zlib.compress(data, 6)
+
+    data = json.dumps(points, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return ENCODING_JSON, len(points), zlib.compress(data, 6)
+
+def decode_route(encoding: str, data: bytes):
+    """
+    압축 바이트 -> 경로 (dict 목록)
+    """
+    raw = zlib.decompress(data)
+    if encoding == ENCODING_JSON:
+        return json.loads(raw)
+    if encoding != ENCODING_DELTA:
+        raise ValueError(f"Unknown route encoding: {encoding}")
+
+    has_time, count, first_time = _HEADER.unpack_from(raw)
+    columns = np.frombuffer(raw, dtype="<i4", offset=_HEADER.size).astype(np.int64).reshape(-1, count)
+    values = np.cumsum(columns, axis=1)
+    lats = (values[0] / COORD_SCALE).tolist()
+    lons = (values[1] / COORD_SCALE).tolist()
+    if not has_time:
+        return [{"latitude": lat, "longitude": lon} for lat, lon in zip(lats, lons)]
+    times = (values[2] + first_time).tolist()
+    return [{"latitude": lat, "longitude": lon, "timestamp": t} for lat, lon, t in zip(lats, lons, times)]
+
+def _can_delta_encode(points):
+    if not points or not isinstance(points, list) or not isinstance(points[0], dict):
+        return False
+    keys = set(points[0])
+    if keys not in _DELTA_KEYS:
+        return False
+    for point in points:
+        if not isinstance(point, dict) or set(point) != keys:
+            return False
+        for value in point.values():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return False
+        # 시각은 정수(ms)만 그대로 되돌릴 수 있습니다.
+        if "timestamp" in keys and not float(point["timestamp"]).is_integer():
+            return False
+    return True
+
+def _deltas(values):
+    """첫 값과 이후 차이 (int32 범위를 벗어나면 None)"""
+    deltas = np.diff(values, prepend=0)
+    if deltas.size and (deltas.min() < _INT32.min or deltas.max() > _INT32.max):
+        return None
+    return deltas
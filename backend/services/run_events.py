@@ -0,0 +1,229 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, select, exists, and_, or_
+
+import models
+from database import SessionLocal
+from routers.achievements import check_and_unlock_achievements
+from routers.challenges import update_challenge_progress, increment_challenge_progress
+from services.feed import fan_out_runs
+
+RUN_EVENT_WORKERS = int(os.getenv("RUN_EVENT_WORKERS", "4"))  # 동시에 처리하는 사용자 수
+RUN_EVENT_MAX_ATTEMPTS = 3  # 실패 시 최대 시도 횟수
+RUN_EVENT_RETRY_DELAY = 1.0  # 재시도/차례 대기(초)
+RUN_EVENT_STUCK_AFTER = timedelta(minutes=5)  # 이 시간 넘게 processing이면 다시 처리
+RUN_EVENT_MAX_REQUEUES = 30  # 차례 대기/재시도로 큐에 다시 넣는 최대 횟수 (넘으면 다음 점검 때 다시 넣음)
+RUN_EVENT_RECOVER_INTERVAL = 60.0  # 멈춘 이벤트 복구 및 남은 이벤트 점검 주기(초)
+
+def record_run_event(db, user_id: int, run_id: int, event_type: str = "run_recorded", run_ids=None) -> models.RunEvent:
+    """
+    러닝 기록 이벤트 추가 ("run_recorded": 기록 하나, "runs_imported": 일괄 업로드)
+
+    일괄 업로드는 run_id에 마지막 기록, run_ids에 새로 저장된 기록 전체를 넘깁니다.
+
+    러닝 기록과 같은 트랜잭션에서 호출해야 하며 커밋은 호출한 쪽에서 합니다.
+    커밋 후 run_event_pipeline.enqueue로 처리를 요청하세요.
+    """
+    event = models.RunEvent(user_id=user_id, run_id=run_id, run_ids=run_ids, event_type=event_type, status="pending")
+    db.add(event)
+    db.flush()
+    return event
+
+def process_run_event(event_id: int) -> str:
+    """
+    이벤트 하나 처리 (업적 → 챌린지 갱신 → 친구 피드 전파)
+
+    목표 진행도는 기록 저장 트랜잭션에서 이미 누적했습니다.
+
+    같은 사용자의 이전 이벤트가 끝나지 않았으면 처리하지 않습니다.
+
+    Returns:
+        "done": 처리 완료 / "retry": 실패했지만 다시 시도 예정
+        "blocked": 이전 이벤트 대기 중 / "skipped": 이미 처리됐거나 다른 워커가 처리 중
+    """
+    db = SessionLocal()
+    try:
+        if not _claim(db, event_id):
+            event = db.get(models.RunEvent, event_id)
+            return "blocked" if event is not None and event.status == "pending" else "skipped"
+
+        event = db.get(models.RunEvent, event_id)
+        try:
+            unlocked = check_and_unlock_achievements(event.user_id, db)
+            run = None
+            if event.event_type == "run_recorded" and event.run_id is not None:
+                run = db.query(models.Run.date, models.Run.distance, models.Run.duration).filter(
+                    models.Run.id == event.run_id
+                ).first()
+            # 챌린지 진행도는 이벤트 완료와 같은 커밋으로 저장해 재시도 시 두 번 더해지지 않습니다.
+            if run is not None:
+                increment_challenge_progress(event.user_id, db, run.date, run.distance, run.duration)
+            else:
+                update_challenge_progress(event.user_id, db)
+            # 친구 타임라인에 기록 요약을 추가합니다 (이미 있는 항목은 건너뜀).
+            fan_out_runs(db, event.run_ids or ([event.run_id] if event.run_id is not None else []))
+
+            event.status = "done"
+            event.unlocked_achievement_ids = [achievement.id for achievement in unlocked]
+            event.processed_at = datetime.utcnow()
+            db.commit()
+            return "done"
+        except Exception as e:
+            db.rollback()
+            print(f"[Run Events] Event {event_id} failed: {e}")
+            event = db.get(models.RunEvent, event_id)
+            event.attempts = (event.attempts or 0) + 1
+            event.error = str(e)[:500]
+            event.status = "failed" if event.attempts >= RUN_EVENT_MAX_ATTEMPTS else "pending"
+            db.commit()
+            return "retry" if event.status == "pending" else "done"
+    finally:
+        db.close()
+
+def _claim(db, event_id: int) -> bool:
+    """
+    pending 이벤트를 processing으로 바꿔 선점 (같은 사용자의 이전 이벤트가 남아 있으면 실패)
+
+    여러 서버 프로세스가 같은 이벤트를 중복 처리하지 않도록 조건부 UPDATE로 선점합니다.
+    처리하던 워커가 죽어 RUN_EVENT_STUCK_AFTER 넘게 processing인 이벤트도 다시 선점합니다.
+    """
+    events = models.RunEvent.__table__
+    older = events.alias("older")
+    now = datetime.utcnow()
+    has_older = exists().where(
+        older.c.user_id == events.c.user_id,
+        older.c.id < events.c.id,
+        older.c.status.in_(("pending", "processing"))
+    )
+    claimable = or_(
+        events.c.status == "pending",
+        and_(events.c.status == "processing", events.c.claimed_at < now - RUN_EVENT_STUCK_AFTER)
+    )
+    result = db.execute(
+        update(events)
+        .where(events.c.id == event_id, claimable, ~has_older)
+        .values(status="processing", claimed_at=now)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+class RunEventPipeline:
+    """
+    러닝 기록 후처리 워커
+
+    사용자 id로 워커 큐를 나누므로 한 사용자의 이벤트는 항상 순서대로 처리되고,
+    서로 다른 사용자의 이벤트는 RUN_EVENT_WORKERS개까지 동시에 처리됩니다.
+    DB 작업은 스레드풀에서 실행합니다.
+
+    RUN_EVENT_RECOVER_INTERVAL마다 멈춘 이벤트를 pending으로 되돌리고
+    큐에 없는 pending 이벤트를 다시 넣습니다.
+    """
+    def __init__(self, workers: int = RUN_EVENT_WORKERS):
+        self.workers = workers
+        self._loop = None
+        self._queues = []
+        self._tasks = []
+        self._queued = set()  # 큐에 있거나 다시 넣기를 기다리는 이벤트
+        self._requeues = {}  # 이벤트 id -> 다시 넣은 횟수
+
+    def start(self):
+        """
+        워커 시작 및 남아 있는 이벤트 복구 (앱 시작 시 호출)
+        """
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queues = [asyncio.Queue() for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+        self._tasks.append(asyncio.create_task(self._recover()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._loop = None
+        self._queues = []
+        self._tasks = []
+        self._queued = set()
+        self._requeues = {}
+
+    def enqueue(self, event_id: int, user_id: int):
+        """
+        커밋된 이벤트 처리 요청 (요청 스레드에서 호출 가능)
+
+        워커가 실행 중이 아니면(스크립트 등) 바로 처리합니다.
+        """
+        if self._loop is None:
+            process_run_event(event_id)
+            return
+        self._loop.call_soon_threadsafe(self._put, event_id, user_id)
+
+    def _put(self, event_id: int, user_id: int) -> bool:
+        """이벤트를 사용자 큐에 넣기 (이미 들어 있으면 무시, 이벤트 루프에서만 호출)"""
+        if event_id in self._queued:
+            return False
+        self._queued.add(event_id)
+        self._queues[user_id % self.workers].put_nowait(event_id)
+        return True
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            event_id = await queue.get()
+            try:
+                outcome = await asyncio.to_thread(process_run_event, event_id)
+            except Exception as e:
+                print(f"[Run Events] Worker error on event {event_id}: {e}")
+                outcome = "retry"
+
+            if outcome in ("blocked", "retry"):
+                requeues = self._requeues.get(event_id, 0) + 1
+                if requeues <= RUN_EVENT_MAX_REQUEUES:
+                    # 이전 이벤트를 기다리거나 재시도하기 위해 잠시 후 다시 넣습니다.
+                    self._requeues[event_id] = requeues
+                    self._loop.call_later(RUN_EVENT_RETRY_DELAY, queue.put_nowait, event_id)
+                    continue
+                # 계속 막혀 있으면 큐에서 빼고 다음 점검(_recover) 때 다시 넣습니다.
+                print(f"[Run Events] Event {event_id} still {outcome} after {RUN_EVENT_MAX_REQUEUES} retries, deferring")
+            self._requeues.pop(event_id, None)
+            self._queued.discard(event_id)
+
+    async def _recover(self):
+        """
+        멈춘 이벤트와 큐에 없는 pending 이벤트를 주기적으로 다시 큐에 넣기
+
+        서버 재시작, 워커 중단, 재시도 횟수 초과로 남은 이벤트를 처리합니다.
+        """
+        while True:
+            try:
+                event_ids = await asyncio.to_thread(_pending_events)
+                recovered = sum(self._put(event_id, user_id) for event_id, user_id in event_ids)
+                if recovered:
+                    print(f"[Run Events] Recovering {recovered} pending events")
+            except Exception as e:
+                print(f"[Run Events] Recovery error: {e}")
+            await asyncio.sleep(RUN_EVENT_RECOVER_INTERVAL)
+
+def _pending_events():
+    db = SessionLocal()
+    try:
+        # 처리 도중 프로세스가 죽은 이벤트는 pending으로 되돌립니다.
+        db.execute(
+            update(models.RunEvent)
+            .where(
+                models.RunEvent.status == "processing",
+                models.RunEvent.claimed_at < datetime.utcnow() - RUN_EVENT_STUCK_AFTER
+            )
+            .values(status="pending")
+        )
+        db.commit()
+        return db.execute(
+            select(models.RunEvent.id, models.RunEvent.user_id)
+            .where(models.RunEvent.status == "pending")
+            .order_by(models.RunEvent.id)
+        ).all()
+    finally:
+        db.close()
+
+run_event_pipeline = RunEventPipeline()
@@ -0,0 +1,165 @@
+"""
+닉네임 검색 (친구 찾기 검색창 자동완성)
+
+PostgreSQL에서는 pg_trgm GIN 인덱스(부분 일치)와 text_pattern_ops 인덱스(접두어)를
+사용하는 쿼리로, 그 밖의 DB(로컬 SQLite 등)에서는 프로세스 메모리의 n-gram/접두어
+색인으로 찾습니다. 어느 쪽이든 결과 순서는 같습니다.
+    정확히 일치 → 접두어 일치 → 앞쪽에서 일치할수록 → 닉네임(소문자) 순 → id 순
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+from sqlalchemy import case, func, select
+
+import models
+
+SEARCH_MAX_RESULTS = 100  # offset + limit 상한
+TRIGRAM = 3
+SHORT_QUERY_MATCH_LIMIT = 1000  # 3글자 미만 검색어의 부분 일치 후보 최대 수 (PostgreSQL)
+
+def search_user_ids(db, query: str, exclude_user_id: int, limit: int = 10, offset: int = 0):
+    """
+    닉네임에 query가 들어간 사용자 id 목록 (순위 순, offset부터 limit개)
+
+    3글자 미만 검색어("o", "철수")는 접두어 일치를 먼저 찾고, 모자란 만큼만
+    부분 일치를 찾습니다. PostgreSQL에서는 이 부분 일치에 인덱스를 쓸 수 없으므로
+    _search_postgresql의 제한을 참고하세요.
+    """
+    query = query.strip().lower()
+    limit = max(0, min(limit, SEARCH_MAX_RESULTS - offset))
+    if not query or limit == 0:
+        return []
+    if db.bind.dialect.name == "postgresql":
+        return _search_postgresql(db, query, exclude_user_id, limit, offset)
+    username_index.sync(db)
+    return username_index.search(query, exclude_user_id, limit, offset)
+
+def _search_postgresql(db, query: str, exclude_user_id: int, limit: int, offset: int):
+    """
+    PostgreSQL 검색 쿼리
+
+    3글자 이상: pg_trgm GIN 인덱스로 부분 일치를 찾아 한 번에 정렬합니다.
+    3글자 미만: 접두어 일치(text_pattern_ops 인덱스)를 먼저 찾고, 모자라면 부분 일치를
+    찾습니다. 1~2글자 '%q%'는 pg_trgm이 색인할 수 없어 users 순차 스캔이 되므로,
+    일치하는 행을 SHORT_QUERY_MATCH_LIMIT개 찾으면 스캔을 멈추고 그 안에서만 정렬합니다.
+    그래서 흔한 글자는 빨리 끝나지만 (a) 후보가 이보다 많으면 순위가 전체 기준과 다를 수
+    있고, (b) 드물게 일치하는 검색어는 여전히 테이블 끝까지 스캔합니다.
+    """
+    name = func.lower(models.User.username)
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    prefix = name.like(f"{escaped}%", escape="\\")
+    contains = name.like(f"%{escaped}%", escape="\\")
+    candidates = db.query(models.User.id).filter(models.User.id != exclude_user_id)
+
+    if len(query) >= TRIGRAM:
+        rows = candidates.filter(contains).order_by(
+            case((name == query, 0), (prefix, 1), else_=2),
+            func.strpos(name, query),
+            name,
+            models.User.id
+        ).offset(offset).limit(limit)
+        return [user_id for (user_id,) in rows]
+
+    needed = offset + limit
+    user_ids = [user_id for (user_id,) in candidates.filter(prefix).order_by(
+        case((name == query, 0), else_=1),
+        name,
+        models.User.id
+    ).limit(needed)]
+    if len(user_ids) < needed:
+        # 정렬 없이 LIMIT만 건 서브쿼리라 후보를 다 찾으면 순차 스캔이 멈춥니다.
+        matched = select(models.User.id).where(
+            contains, ~prefix, models.User.id != exclude_user_id
+        ).limit(SHORT_QUERY_MATCH_LIMIT)
+        user_ids += [user_id for (user_id,) in db.query(models.User.id).filter(
+            models.User.id.in_(matched)
+        ).order_by(
+            func.strpos(name, query),
+            name,
+            models.User.id
+        ).limit(needed - len(user_ids))]
+    return user_ids[offset:]
+
+def _grams(text: str, n: int = TRIGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class UsernameIndex:
+    """
+    닉네임 1~3글자 n-gram 역색인 + 정렬된 닉네임 목록(접두어 검색용)
+
+    3글자 미만 검색어는 같은 길이의 n-gram 목록이 곧 부분 일치 후보입니다.
+
+    처음 검색할 때 전체를 읽고, 이후에는 검색할 때마다 마지막으로 읽은 id 이후에
+    가입한 사용자만 추가로 읽습니다 (닉네임은 바뀌지 않으므로 추가만 반영).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}  # user_id -> (소문자 닉네임, 닉네임)
+        self._postings = {}  # 1~3글자 n-gram -> user_id 집합
+        self._sorted = []  # (소문자 닉네임, user_id) 정렬 목록
+        self._max_user_id = 0
+
+    def sync(self, db):
+        """새로 가입한 사용자 반영 (id 범위 조회 한 번)"""
+        rows = db.query(models.User.id, models.User.username).filter(
+            models.User.id > self._max_user_id
+        ).order_by(models.User.id).all()
+        if not rows:
+            return
+        with self._lock:
+            for user_id, username in rows:
+                if user_id > self._max_user_id:
+                    self.add(user_id, username)
+
+    def add(self, user_id: int, username: str):
+        lowered = username.lower()
+        self._names[user_id] = (lowered, username)
+        for n in range(1, TRIGRAM + 1):
+            for gram in _grams(lowered, n):
+                self._postings.setdefault(gram, set()).add(user_id)
+        insort(self._sorted, (lowered, user_id))
+        self._max_user_id = max(self._max_user_id, user_id)
+
+    def search(self, query: str, exclude_user_id: int, limit: int, offset: int):
+        needed = offset + limit
+        # 정렬 목록에서 접두어 일치를 순서대로 (정확히 일치하는 닉네임이 맨 앞)
+        results = []
+        for user_id in self._prefix_candidates(query):
+            if user_id != exclude_user_id:
+                results.append(user_id)
+                if len(results) >= needed:
+                    return results[offset:]
+
+        # 접두어 일치로 모자라면 중간에서 일치하는 닉네임을 (위치, 닉네임, id) 순으로 채웁니다.
+        def rank(user_id):
+            lowered = self._names[user_id][0]
+            return (lowered.find(query), lowered, user_id)
+
+        results += heapq.nsmallest(
+            needed - len(results),
+            (user_id for user_id in self._substring_candidates(query) if user_id != exclude_user_id),
+            key=rank
+        )
+        return results[offset:]
+
+    def _prefix_candidates(self, query: str):
+        for i in range(bisect_left(self._sorted, (query,)), len(self._sorted)):
+            lowered, user_id = self._sorted[i]
+            if not lowered.startswith(query):
+                break
+            yield user_id
+
+    def _substring_candidates(self, query: str):
+        """닉네임 중간(접두어 제외)에 query가 들어간 사용자"""
+        postings = [self._postings.get(gram) for gram in _grams(query, min(len(query), TRIGRAM))]
+        if any(posting is None for posting in postings):
+            return
+        # 가장 작은 집합부터 교집합을 구하고, trigram이 모두 있어도 실제로 포함하는지 확인합니다.
+        postings.sort(key=len)
+        candidates = set.intersection(*postings)
+        for user_id in candidates:
+            if self._names[user_id][0].find(query) > 0:
+                yield user_id
+
+username_index = UsernameIndex()
@@ -0,0 +1,91 @@
+import asyncio
+import os
+from datetime import datetime, time, timedelta
+
+from services.weather_service import weather_service
+
+# 기상청 단기예보 발표 시각 (_get_base_time과 동일)
+BASE_HOURS = [2, 5, 8, 11, 14, 17, 20, 23]
+
+PREFETCH_ENABLED = os.getenv("WEATHER_PREFETCH_ENABLED", "true").lower() == "true"
+# 발표 후 API에 반영되기까지 기다리는 시간 (기상청은 발표 약 10분 후 제공)
+PREFETCH_DELAY = timedelta(minutes=int(os.getenv("WEATHER_PREFETCH_DELAY_MINUTES", "15")))
+PREFETCH_HOT_WINDOW = 12 * 60 * 60  # 최근 12시간 안에 요청된 격자만 갱신
+PREFETCH_MAX_CELLS = 500  # 한 번에 갱신할 최대 격자 수
+PREFETCH_BATCH_SIZE = 50  # 배치 단위
+PREFETCH_CONCURRENCY = 5  # 배치 내 동시 요청 수
+
+class WeatherPrefetcher:
+    """
+    예보 발표 직후 최근 요청된 격자의 날씨를 미리 받아 캐시를 데워두는 스케줄러
+    """
+    def __init__(self, service=weather_service):
+        self.service = service
+        self._task = None
+        self._semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+    def start(self):
+        """
+        백그라운드 작업 시작 (이미 실행 중이면 무시)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        백그라운드 작업 중지
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def next_run_at(self, now: datetime) -> datetime:
+        """
+        다음 갱신 시각 (다음 발표 시각 + 반영 지연)
+        """
+        candidates = [
+            datetime.combine(now.date() + timedelta(days=day_offset), time(hour)) + PREFETCH_DELAY
+            for day_offset in (0, 1)
+            for hour in BASE_HOURS
+        ]
+        return min(run_at for run_at in candidates if run_at > now)
+
+    async def _run(self):
+        while True:
+            run_at = self.next_run_at(datetime.now())
+            wait = (run_at - datetime.now()).total_seconds()
+            print(f"[Weather Prefetch] Next refresh at {run_at:%Y-%m-%d %H:%M}")
+            await asyncio.sleep(max(wait, 0))
+
+            try:
+                await self.refresh_hot_cells()
+            except Exception as e:
+                print(f"[Weather Prefetch] Error: {e}")
+
+    async def refresh_hot_cells(self):
+        """
+        최근 요청된 격자들을 배치 단위로 갱신
+        """
+        cells = self.service.get_hot_cells(PREFETCH_HOT_WINDOW, limit=PREFETCH_MAX_CELLS)
+        if not cells:
+            return 0
+
+        print(f"[Weather Prefetch] Refreshing {len(cells)} cells")
+        refreshed = 0
+        for i in range(0, len(cells), PREFETCH_BATCH_SIZE):
+            batch = cells[i:i + PREFETCH_BATCH_SIZE]
+            results = await asyncio.gather(*(self._refresh(nx, ny) for nx, ny in batch))
+            refreshed += sum(1 for result in results if result is not None)
+
+        print(f"[Weather Prefetch] Refreshed {refreshed}/{len(cells)} cells")
+        return refreshed
+
+    async def _refresh(self, nx: int, ny: int):
+        async with self._semaphore:
+            return await self.service.get_timeline(nx, ny)
+
+weather_prefetcher = WeatherPrefetcher()
@@ -1,38 +1,419 @@
-import requests
+import asyncio
+import math
+import random
+import re
+import time
+from array import array
+import httpx
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from urllib.parse import unquote
 
+from services.kma_grid import latlon_to_grid
+
 load_dotenv()
 
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
 # API 키가 인코딩되어 있다면 디코딩
 if WEATHER_API_KEY and '%' in WEATHER_API_KEY:
     WEATHER_API_KEY = unquote(WEATHER_API_KEY)
+WEATHER_API_BASE_URL = os.getenv("WEATHER_API_BASE_URL", "https://apis.data.go.kr/1360000/VilageFcstInfoService_2.0")
+
+# HTTP/2는 h2 패키지가 설치된 경우에만 사용합니다. (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 기상청 API 연결 풀 / 재시도 설정
+WEATHER_TIMEOUT = 10.0  # 전체 요청 타임아웃(초)
+WEATHER_CONNECT_TIMEOUT = 3.0  # 연결 타임아웃(초)
+WEATHER_MAX_CONNECTIONS = 20  # 풀 최대 연결 수
+WEATHER_MAX_KEEPALIVE = 10  # 유지할 keep-alive 연결 수
+WEATHER_MAX_CONCURRENCY = 10  # 동시에 진행할 수 있는 upstream 요청 수
+WEATHER_MAX_RETRIES = 2  # 실패 시 추가 재시도 횟수
+WEATHER_BACKOFF_BASE = 0.3  # 재시도 대기 기본값(초)
+WEATHER_BACKOFF_MAX = 2.0  # 재시도 대기 최댓값(초)
+
+# 서킷 브레이커 / 지난 예보 사용 설정
+WEATHER_BREAKER_FAILURE_THRESHOLD = 5  # 연속으로 실패한 upstream 시도가 이만큼이면 차단
+WEATHER_BREAKER_RESET_TIMEOUT = 30.0  # 차단 후 시험 요청까지 대기(초)
+WEATHER_STALE_MAX_AGE = timedelta(hours=24)  # 이보다 오래된 예보는 대체 응답으로 쓰지 않음
+
+# 타임라인에 보관하는 예보 항목
+# TMP: 기온, REH: 습도, PCP: 강수량, POP: 강수확률, WSD: 풍속, SKY: 하늘상태
+TIMELINE_CATEGORIES = ('TMP', 'REH', 'PCP', 'POP', 'WSD', 'SKY')
+WEATHER_NUM_OF_ROWS = '1000'  # 한 발표분 전체(약 3일치)를 한 번에 받습니다.
+NAN = float('nan')
+
+class ForecastTimeline:
+    """
+    한 격자의 발표분 전체 예보
+    
+    항목별로 start부터 1시간 간격의 double 배열을 가지며, 값이 없는 시각은 NaN입니다.
+    """
+    def __init__(self, base_date: str, base_time: str, start: datetime, series: dict):
+        self.base_date = base_date
+        self.base_time = base_time
+        self.start = start
+        self.series = series
+        self.hours = len(series['TMP'])
+    
+    def index_of(self, target: datetime):
+        """
+        target이 속한 시간의 배열 인덱스 (예보 시작 전이면 첫 시간, 범위 밖이면 None)
+        """
+        index = max(int((target - self.start).total_seconds() // 3600), 0)
+        return index if index < self.hours else None
+    
+    def hour_of(self, target: datetime) -> datetime:
+        return self.start + timedelta(hours=self.index_of(target) or 0)
+    
+    def at(self, target: datetime):
+        """
+        target 시각의 예보 (_evaluate_running_conditions 입력 형식)
+        
+        그 시각에 예보가 없는 항목은 None입니다.
+        """
+        index = self.index_of(target)
+        if index is None:
+            return None
+        
+        def value(category):
+            v = self.series[category][index]
+            return None if math.isnan(v) else v
+        
+        def int_value(category):
+            v = value(category)
+            return None if v is None else int(v)
+        
+        sky_code = int_value('SKY')
+        if sky_code is None:
+            sky_condition = '정보 없음'
+        elif sky_code == 1:
+            sky_condition = '맑음'
+        elif sky_code == 3:
+            sky_condition = '구름많음'
+        else:
+            sky_condition = '흐림'
+        
+        return {
+            'temperature': value('TMP'),
+            'humidity': int_value('REH'),
+            'precipitation': value('PCP'),
+            'precipitation_probability': int_value('POP'),
+            'wind_speed': value('WSD'),
+            'sky_condition': sky_condition
+        }
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 upstream 요청을 보내지 않은 경우"""
+
+class CircuitBreaker:
+    """
+    upstream 장애 시 요청을 바로 실패시키는 서킷 브레이커
+    
+    closed: 정상 / open: 모든 요청 차단 / half_open: 시험 요청 하나만 허용
+    """
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+    
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self._probe_in_flight = False
+        # half_open: 시험 요청은 하나만 보냅니다.
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+    
+    def record_success(self):
+        if self.state != "closed":
+            print("[Weather API] Circuit closed")
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+    
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        # 이미 열린 뒤에 끝난 요청들은 차단 시간을 늘리지 않습니다.
+        if self.state == "open":
+            return
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            print(f"[Weather API] Circuit opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """
+        upstream 장애와 무관하게 끝난 요청 (잘못된 요청/데이터)
+
+        실패로 세지 않고, half_open이면 다음 요청이 시험 요청이 되도록 풀어 줍니다.
+        """
+        self._probe_in_flight = False
 
 class WeatherService:
     def __init__(self):
         self.api_key = WEATHER_API_KEY
-        # HTTPS 사용
-        self.base_url = "https://apis.data.go.kr/1360000/VilageFcstInfoService_2.0"
+        # HTTPS 사용 (부하/장애 시험 시 mock_kma_server.py 주소로 바꿀 수 있습니다)
+        self.base_url = WEATHER_API_BASE_URL
+        # 연결 풀은 이벤트 루프 안에서 처음 사용할 때 생성합니다.
+        self._client = None
+        self._semaphore = asyncio.Semaphore(WEATHER_MAX_CONCURRENCY)
+        # 격자별 최신 예보 캐시: (nx, ny) -> ForecastTimeline
+        self._cache = {}
+        # 진행 중인 upstream 요청: (nx, ny, base_date, base_time) -> Task
+        self._inflight = {}
+        # 격자별 마지막 요청 시각 (time.monotonic)
+        self._cell_last_requested = {}
+        self._breaker = CircuitBreaker(WEATHER_BREAKER_FAILURE_THRESHOLD, WEATHER_BREAKER_RESET_TIMEOUT)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        keep-alive 연결 풀을 공유하는 비동기 HTTP 클라이언트 반환
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(WEATHER_TIMEOUT, connect=WEATHER_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=WEATHER_MAX_CONNECTIONS,
+                    max_keepalive_connections=WEATHER_MAX_KEEPALIVE,
+                    keepalive_expiry=30.0
+                ),
+                http2=HTTP2_AVAILABLE
+            )
+        return self._client
+    
+    async def aclose(self):
+        """
+        연결 풀 정리 (앱 종료 시 호출)
+        """
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """
+        지수 백오프 + full jitter 대기 시간 계산
+        """
+        return random.uniform(0, min(WEATHER_BACKOFF_MAX, WEATHER_BACKOFF_BASE * (2 ** attempt)))
     
-    def get_weather(self, lat: float, lon: float):
+    async def _request_forecast(self, params: dict):
+        """
+        단기예보 API 호출 (동시성 제한 + 재시도)
+        
+        연결 오류, 타임아웃, 429/5xx 응답만 재시도하며
+        그 외 응답은 그대로 반환합니다. 서킷이 열리면 CircuitOpenError를 발생시킵니다.
+        """
+        client = self._get_client()
+        url = f"{self.base_url}/getVilageFcst"
+        
+        for attempt in range(WEATHER_MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    # 대기하는 동안 다른 요청들로 서킷이 열렸다면 바로 포기합니다.
+                    if self._breaker.state == "open":
+                        raise CircuitOpenError()
+                    response = await client.get(url, params=params)
+                
+                if not self._is_retryable(response):
+                    return response
+                # 실패한 시도마다 서킷 브레이커에 기록해 장애를 빨리 감지합니다.
+                self._breaker.record_failure()
+                if attempt == WEATHER_MAX_RETRIES:
+                    return response
+                print(f"[Weather API] Retryable status {response.status_code} (attempt {attempt + 1})")
+            except httpx.TransportError as e:
+                self._breaker.record_failure()
+                if attempt == WEATHER_MAX_RETRIES:
+                    raise
+                print(f"[Weather API] Transport error: {e!r} (attempt {attempt + 1})")
+            
+            await asyncio.sleep(self._backoff_delay(attempt))
+    
+    def _is_retryable(self, response: httpx.Response) -> bool:
+        return response.status_code == 429 or response.status_code >= 500
+    
+    async def get_weather(self, lat: float, lon: float, hours_ahead: int = 0):
         """
         기상청 단기예보 API를 사용하여 날씨 정보 가져오기
+        
+        hours_ahead: 현재로부터 몇 시간 뒤의 예보인지 (0이면 현재)
+        """
+        timeline, is_stale = await self._resolve_timeline(lat, lon)
+        if timeline is None:
+            return self._get_unavailable_weather()
+        
+        target = datetime.now() + timedelta(hours=hours_ahead)
+        weather_info = timeline.at(target)
+        if weather_info is None:
+            return self._get_unavailable_weather()
+        return self._build_result(timeline, target, weather_info, is_stale)
+    
+    async def get_best_running_window(self, lat: float, lon: float, duration_hours: int = 1):
+        """
+        오늘 남은 시간 중 러닝하기 가장 좋은 연속 구간 찾기
+        
+        시간별 예보에 _running_penalty 점수를 매기고 합이 가장 작은
+        duration_hours 길이의 구간을 고릅니다.
+        """
+        timeline, is_stale = await self._resolve_timeline(lat, lon)
+        if timeline is None:
+            return {'window': None, 'hours': [], 'is_stale': True, 'forecast_base_time': None}
+        
+        now = datetime.now().replace(minute=0, second=0, microsecond=0)
+        end_of_day = now.replace(hour=23)
+        
+        hours = []
+        target = now
+        while target <= end_of_day:
+            weather_info = timeline.at(target)
+            if weather_info is not None:
+                hours.append(self._build_result(timeline, target, weather_info, is_stale))
+            target += timedelta(hours=1)
+        
+        best = None
+        for i in range(len(hours) - duration_hours + 1):
+            window = hours[i:i + duration_hours]
+            penalty = sum(self._running_penalty(hour) for hour in window)
+            if best is None or penalty < best[0]:
+                best = (penalty, window)
+        
+        result = {
+            'window': None,
+            'hours': hours,
+            'is_stale': is_stale,
+            'forecast_base_time': timeline.base_date + timeline.base_time
+        }
+        if best is not None:
+            window = best[1]
+            result['window'] = {
+                'start': window[0]['forecast_time'],
+                'end': (datetime.strptime(window[-1]['forecast_time'], "%Y%m%d%H%M") + timedelta(hours=1)).strftime("%Y%m%d%H%M"),
+                'is_good_for_running': all(hour['is_good_for_running'] for hour in window),
+                'temperature': window[0]['temperature'],
+                'condition': window[0]['condition']
+            }
+        return result
+    
+    async def _resolve_timeline(self, lat: float, lon: float):
+        """
+        좌표의 예보 타임라인과 오래된 데이터 여부 반환
+        
+        upstream 장애 시 이 격자의 마지막 정상 타임라인을 is_stale=True로
+        반환하고, 그마저 없으면 (None, True)를 반환합니다.
+        """
+        # 좌표를 기상청 격자 좌표로 변환 (간단한 근사값)
+        nx, ny = self._convert_to_grid(lat, lon)
+        print(f"[Weather API] Requesting: lat={lat}, lon={lon}, nx={nx}, ny={ny}")
+        
+        # 사전 갱신(prefetch) 대상 격자를 추적합니다.
+        self._cell_last_requested[(nx, ny)] = time.monotonic()
+        
+        timeline = await self.get_timeline(nx, ny)
+        if timeline is not None:
+            return timeline, False
+        return self._get_stale_timeline(nx, ny), True
+    
+    def _build_result(self, timeline, target: datetime, weather_info: dict, is_stale: bool):
+        """
+        타임라인의 한 시간 예보를 API 응답 형식으로 변환
+        """
+        result = self._evaluate_running_conditions(weather_info)
+        result['is_stale'] = is_stale
+        result['forecast_base_time'] = timeline.base_date + timeline.base_time
+        result['forecast_time'] = timeline.hour_of(target).strftime("%Y%m%d%H%M")
+        return result
+    
+    async def get_timeline(self, nx: int, ny: int):
+        """
+        격자 단위 예보 타임라인 조회 (발표 시각별 캐시 사용)
+        
+        같은 격자의 같은 발표분은 한 번만 요청하고, 동시에 들어온 요청은
+        진행 중인 요청 하나를 함께 기다립니다. 실패하거나 서킷이 열려 있으면
+        None을 반환합니다.
+        """
+        base_date, base_time = self._get_base_datetime(datetime.now())
+        
+        cached = self._cache.get((nx, ny))
+        if cached is not None and (cached.base_date, cached.base_time) == (base_date, base_time):
+            return cached
+        
+        key = (nx, ny, base_date, base_time)
+        task = self._inflight.get(key)
+        if task is None:
+            if not self._breaker.allow_request():
+                print(f"[Weather API] Circuit {self._breaker.state}, skipping upstream for nx={nx}, ny={ny}")
+                return None
+            task = asyncio.ensure_future(self._refresh_cell(nx, ny, base_date, base_time))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # 요청이 취소되어도 upstream 호출은 끝까지 진행해 캐시를 채웁니다.
+        return await asyncio.shield(task)
+    
+    async def _refresh_cell(self, nx: int, ny: int, base_date: str, base_time: str):
+        """
+        격자 예보를 가져와 캐시에 저장
+        """
+        timeline = await self._fetch_cell(nx, ny, base_date, base_time)
+        if timeline is None:
+            return None
+        
+        self._breaker.record_success()
+        self._cache[(nx, ny)] = timeline
+        return timeline
+    
+    def _get_stale_timeline(self, nx: int, ny: int):
+        """
+        캐시된 마지막 정상 타임라인, 없거나 너무 오래됐으면 None
+        """
+        timeline = self._cache.get((nx, ny))
+        if timeline is None:
+            return None
+        
+        published_at = datetime.strptime(timeline.base_date + timeline.base_time, "%Y%m%d%H%M")
+        if datetime.now() - published_at > WEATHER_STALE_MAX_AGE:
+            return None
+        return timeline
+    
+    def get_hot_cells(self, max_age: float, limit: int = None):
+        """
+        최근 max_age초 안에 요청된 격자 목록 (최근 요청 순)
+        """
+        cutoff = time.monotonic() - max_age
+        for cell, last in list(self._cell_last_requested.items()):
+            if last < cutoff:
+                del self._cell_last_requested[cell]
+        
+        cells = sorted(self._cell_last_requested, key=self._cell_last_requested.get, reverse=True)
+        return cells[:limit] if limit else cells
+    
+    async def _fetch_cell(self, nx: int, ny: int, base_date: str, base_time: str):
+        """
+        단기예보 API 호출 및 타임라인 파싱 (실패 시 None)
+
+        연결 오류와 429/5xx만 upstream 장애로 서킷 브레이커에 기록합니다 (_request_forecast).
+        NO_DATA 등 오류 resultCode, 4xx, 잘못된 응답 본문은 이 요청만 실패로 처리합니다.
         """
         try:
-            # 좌표를 기상청 격자 좌표로 변환 (간단한 근사값)
-            nx, ny = self._convert_to_grid(lat, lon)
-            
-            now = datetime.now()
-            base_date = now.strftime("%Y%m%d")
-            base_time = self._get_base_time(now)
-            
             params = {
                 'serviceKey': self.api_key,
                 'pageNo': '1',
-                'numOfRows': '100',
+                'numOfRows': WEATHER_NUM_OF_ROWS,
                 'dataType': 'JSON',
                 'base_date': base_date,
                 'base_time': base_time,
@@ -40,11 +421,10 @@ class WeatherService:
                 'ny': ny
             }
             
-            print(f"[Weather API] Requesting: lat={lat}, lon={lon}, nx={nx}, ny={ny}")
-            print(f"[Weather API] Date: {base_date}, Time: {base_time}")
+            print(f"[Weather API] Fetching: nx={nx}, ny={ny}, Date: {base_date}, Time: {base_time}")
             print(f"[Weather API] API Key: {self.api_key[:10]}..." if self.api_key else "[Weather API] No API Key")
             
-            response = requests.get(f"{self.base_url}/getVilageFcst", params=params, timeout=10)
+            response = await self._request_forecast(params)
             
             print(f"[Weather API] Status Code: {response.status_code}")
             
@@ -55,63 +435,55 @@ class WeatherService:
                 # 응답 코드 확인
                 header = data.get('response', {}).get('header', {})
                 if header.get('resultCode') == '00':
-                    return self._parse_weather_data(data)
+                    timeline = self._parse_weather_data(data, base_date, base_time)
+                    if timeline is None:
+                        self._breaker.release_probe()
+                    return timeline
                 else:
                     print(f"[Weather API] Error: {header.get('resultMsg')}")
-                    return self._get_dummy_weather()
+                    self._breaker.release_probe()
+                    return None
             else:
                 print(f"[Weather API] HTTP Error: {response.text[:200]}")
-                return self._get_dummy_weather()
+                # 429/5xx는 _request_forecast에서 이미 기록했습니다.
+                if not self._is_retryable(response):
+                    self._breaker.release_probe()
+                return None
                 
+        except CircuitOpenError:
+            print(f"[Weather API] Circuit opened, giving up nx={nx}, ny={ny}")
+            return None
+        except httpx.TransportError as e:
+            # 재시도 모두 실패 (_request_forecast에서 이미 기록)
+            print(f"[Weather API] Transport error: {e!r}")
+            return None
+        except ValueError as e:
+            # JSON이 아닌 응답 (잘린 응답, XML 오류 메시지 등)
+            print(f"[Weather API] Invalid response body: {e}")
+            self._breaker.release_probe()
+            return None
         except Exception as e:
             print(f"[Weather API] Exception: {e}")
             import traceback
             traceback.print_exc()
-            return self._get_dummy_weather()
+            self._breaker.release_probe()
+            return None
     
     def _convert_to_grid(self, lat: float, lon: float):
         """
         위경도를 기상청 격자 좌표로 변환 (Lambert Conformal Conic)
         """
-        import math
-        
-        RE = 6371.00877  # 지구 반경(km)
-        GRID = 5.0  # 격자 간격(km)
-        SLAT1 = 30.0  # 표준위도1
-        SLAT2 = 60.0  # 표준위도2
-        OLON = 126.0  # 기준점 경도
-        OLAT = 38.0  # 기준점 위도
-        XO = 43  # 기준점 X좌표
-        YO = 136  # 기준점 Y좌표
-        
-        DEGRAD = math.pi / 180.0
-        
-        re = RE / GRID
-        slat1 = SLAT1 * DEGRAD
-        slat2 = SLAT2 * DEGRAD
-        olon = OLON * DEGRAD
-        olat = OLAT * DEGRAD
-        
-        sn = math.tan(math.pi * 0.25 + slat2 * 0.5) / math.tan(math.pi * 0.25 + slat1 * 0.5)
-        sn = math.log(math.cos(slat1) / math.cos(slat2)) / math.log(sn)
-        sf = math.tan(math.pi * 0.25 + slat1 * 0.5)
-        sf = math.pow(sf, sn) * math.cos(slat1) / sn
-        ro = math.tan(math.pi * 0.25 + olat * 0.5)
-        ro = re * sf / math.pow(ro, sn)
-        
-        ra = math.tan(math.pi * 0.25 + lat * DEGRAD * 0.5)
-        ra = re * sf / math.pow(ra, sn)
-        theta = lon * DEGRAD - olon
-        if theta > math.pi:
-            theta -= 2.0 * math.pi
-        if theta < -math.pi:
-            theta += 2.0 * math.pi
-        theta *= sn
-        
-        x = math.floor(ra * math.sin(theta) + XO + 0.5)
-        y = math.floor(ro - ra * math.cos(theta) + YO + 0.5)
-        
-        return int(x), int(y)
+        return latlon_to_grid(lat, lon)
+    
+    def _get_base_datetime(self, now):
+        """
+        기상청 API 발표 일자와 시각 계산
+        
+        02시 이전에는 전날 23시 발표분을 사용합니다.
+        """
+        base_time = self._get_base_time(now)
+        base_day = now - timedelta(days=1) if now.hour < 2 else now
+        return base_day.strftime("%Y%m%d"), base_time
     
     def _get_base_time(self, now):
         """
@@ -137,66 +509,74 @@ class WeatherService:
         else:
             return "2300"
     
-    def _parse_weather_data(self, data):
+    def _parse_weather_data(self, data, base_date: str, base_time: str):
         """
         기상청 API 응답 파싱
+        
+        발표분 전체(약 3일치)를 시간별 배열로 모은 ForecastTimeline을 반환합니다.
         """
         try:
             items = data['response']['body']['items']['item']
             print(f"[Weather API] Parsing {len(items)} items")
             
-            weather_info = {
-                'temperature': 0,
-                'humidity': 0,
-                'precipitation': 0,
-                'wind_speed': 0,
-                'sky_condition': '맑음'  # 기본값 설정
-            }
-            
+            values = {}  # (category, 예보 시각) -> 값
             for item in items:
                 category = item['category']
-                value = item['fcstValue']
-                
-                if category == 'TMP':  # 기온
-                    weather_info['temperature'] = float(value)
-                    print(f"[Weather API] Temperature: {value}°C")
-                elif category == 'REH':  # 습도
-                    weather_info['humidity'] = int(value)
-                    print(f"[Weather API] Humidity: {value}%")
-                elif category == 'PCP':  # 강수량
-                    if value == '강수없음':
-                        weather_info['precipitation'] = 0
-                    elif '미만' in value:
-                        weather_info['precipitation'] = 0  # '1 미만'은 0으로 처리
-                    else:
-                        try:
-                            weather_info['precipitation'] = float(value.replace('mm', ''))
-                        except ValueError:
-                            weather_info['precipitation'] = 0
-                    print(f"[Weather API] Precipitation: {value}")
-                elif category == 'WSD':  # 풍속
-                    weather_info['wind_speed'] = float(value)
-                    print(f"[Weather API] Wind Speed: {value}m/s")
-                elif category == 'SKY':  # 하늘상태
-                    sky_code = int(value)
-                    if sky_code == 1:
-                        weather_info['sky_condition'] = '맑음'
-                    elif sky_code == 3:
-                        weather_info['sky_condition'] = '구름많음'
-                    else:
-                        weather_info['sky_condition'] = '흐림'
-                    print(f"[Weather API] Sky: {weather_info['sky_condition']} (code: {sky_code})")
+                if category not in TIMELINE_CATEGORIES:
+                    continue
+                fcst_at = datetime.strptime(item['fcstDate'] + item['fcstTime'], "%Y%m%d%H%M")
+                values[(category, fcst_at)] = self._parse_value(category, item['fcstValue'])
+            
+            if not values:
+                print("[Weather API] Parse Error: no forecast items")
+                return None
             
-            print(f"[Weather API] Parsed weather: {weather_info}")
-            result = self._evaluate_running_conditions(weather_info)
-            print(f"[Weather API] Final result: {result}")
-            return result
+            fcst_times = [fcst_at for _, fcst_at in values]
+            start = min(fcst_times)
+            hours = int((max(fcst_times) - start).total_seconds() // 3600) + 1
+            
+            series = {category: array('d', [NAN]) * hours for category in TIMELINE_CATEGORIES}
+            for (category, fcst_at), value in values.items():
+                series[category][int((fcst_at - start).total_seconds() // 3600)] = value
+            
+            timeline = ForecastTimeline(base_date, base_time, start, series)
+            print(f"[Weather API] Parsed timeline: {start:%Y-%m-%d %H:%M} + {hours}h")
+            return timeline
             
         except Exception as e:
             print(f"[Weather API] Parse Error: {e}")
             import traceback
             traceback.print_exc()
-            return self._get_dummy_weather()
+            return None
+    
+    def _parse_value(self, category: str, value: str) -> float:
+        """
+        예보 값 하나를 숫자로 변환
+        """
+        if category == 'PCP':  # 강수량
+            if value == '강수없음' or '미만' in value:
+                return 0.0  # '1mm 미만'은 0으로 처리
+            # '30.0~50.0mm', '50.0mm 이상'은 하한값 사용
+            match = re.search(r'[\d.]+', value)
+            return float(match.group()) if match else 0.0
+        return float(value)
+    
+    def _running_penalty(self, hour: dict) -> float:
+        """
+        시간별 예보의 러닝 부적합 점수 (낮을수록 좋음)
+        """
+        penalty = 0.0 if hour['is_good_for_running'] else 100.0
+        # 10~18°C를 가장 쾌적한 기온으로 봅니다.
+        temp = hour['temperature']
+        if temp is None:
+            penalty += 10.0  # 값이 없는 시각은 다른 시각보다 뒤로 미룹니다.
+        elif temp < 10:
+            penalty += 10 - temp
+        elif temp > 18:
+            penalty += temp - 18
+        penalty += hour['wind_speed'] if hour['wind_speed'] is not None else 10.0
+        penalty += (hour.get('precipitation_probability') or 0) / 10
+        return penalty
     
     def _evaluate_running_conditions(self, weather_info):
         """
@@ -210,24 +590,31 @@ class WeatherService:
         reasons = []
         
         # 비가 오는 경우
-        if precipitation > 0:
+        if precipitation is not None and precipitation > 0:
             is_good = False
             reasons.append("비가 오고 있습니다")
         
         # 너무 덥거나 추운 경우
-        if temp > 30:
+        if temp is not None and temp > 30:
             is_good = False
             reasons.append("기온이 너무 높습니다")
-        elif temp < 0:
+        elif temp is not None and temp < 0:
             is_good = False
             reasons.append("기온이 너무 낮습니다")
         
         # 바람이 강한 경우
-        if wind_speed > 10:
+        if wind_speed is not None and wind_speed > 10:
             is_good = False
             reasons.append("바람이 강합니다")
         
-        recommendation = "실외 러닝하기 좋은 날씨입니다!" if is_good else f"실내 운동을 추천합니다. ({', '.join(reasons)})"
+        if not is_good:
+            recommendation = f"실내 운동을 추천합니다. ({', '.join(reasons)})"
+        elif None in (temp, precipitation, wind_speed):
+            # 빠진 항목이 있으면 좋다고 단정하지 않습니다.
+            is_good = None
+            recommendation = "일부 날씨 정보가 없어 러닝하기 좋은지 판단할 수 없습니다."
+        else:
+            recommendation = "실외 러닝하기 좋은 날씨입니다!"
         
         return {
             'temperature': temp,
@@ -235,28 +622,35 @@ class WeatherService:
             'humidity': weather_info['humidity'],
             'wind_speed': wind_speed,
             'precipitation': precipitation,
+            'precipitation_probability': weather_info['precipitation_probability'],
             'is_good_for_running': is_good,
             'recommendation': recommendation
         }
     
-    def _get_dummy_weather(self):
+    def _get_unavailable_weather(self):
         """
-        API 실패 시 더미 데이터
+        API 실패 시 응답 (지난 예보도 없을 때)
+        
+        실제와 다를 수 있는 임의의 날씨 대신 정보가 없음을 명시합니다.
         """
         return {
-            'temperature': 20.0,
-            'condition': '맑음',
-            'humidity': 60,
-            'wind_speed': 2.5,
-            'precipitation': 0,
-            'is_good_for_running': True,
-            'recommendation': '실외 러닝하기 좋은 날씨입니다!'
+            'temperature': None,
+            'condition': '정보 없음',
+            'humidity': None,
+            'wind_speed': None,
+            'precipitation': None,
+            'precipitation_probability': None,
+            'is_good_for_running': None,
+            'recommendation': '날씨 정보를 가져올 수 없습니다. 잠시 후 다시 시도해주세요.',
+            'is_stale': True,
+            'forecast_base_time': None,
+            'forecast_time': None
         }
 
 weather_service = WeatherService()
 
-def get_weather_data(lat: float, lon: float):
+async def get_weather_data(lat: float, lon: float):
     """
     날씨 데이터 가져오기 (main.py에서 호출)
     """
-    return weather_service.get_weather(lat, lon)
+    return await weather_service.get_weather(lat, lon)
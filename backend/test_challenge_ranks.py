@@ -0,0 +1,99 @@
+"""챌린지 진행도/순위 갱신 테스트 (두 사용자가 같은 챌린지에 기록을 번갈아 추가)
+
+실제 DB 대신 임시 SQLite 파일을 사용합니다.
+    python test_challenge_ranks.py
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "twieo_test_challenge_ranks.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import event
+
+import models
+from database import engine, SessionLocal
+from routers.challenges import increment_challenge_progress, rebuild_challenge_ranks
+
+def _setup():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        users = [models.User(email=f"runner{i}@test.com", username=f"runner{i}", hashed_password="x") for i in range(2)]
+        db.add_all(users)
+        db.flush()
+        now = datetime.utcnow()
+        challenge = models.Challenge(
+            creator_id=users[0].id, name="10km", challenge_type="distance", target_value=10.0,
+            start_date=now - timedelta(days=1), end_date=now + timedelta(days=7), is_active=True
+        )
+        db.add(challenge)
+        db.flush()
+        db.add_all([
+            models.ChallengeParticipant(challenge_id=challenge.id, user_id=user.id, current_value=0.0, rank=rank)
+            for rank, user in enumerate(users, start=1)
+        ])
+        db.commit()
+        return [user.id for user in users], challenge.id
+    finally:
+        db.close()
+
+def _ranks(db, challenge_id):
+    return {
+        user_id: (rank, value)
+        for user_id, rank, value in db.query(
+            models.ChallengeParticipant.user_id, models.ChallengeParticipant.rank, models.ChallengeParticipant.current_value
+        ).filter(models.ChallengeParticipant.challenge_id == challenge_id)
+    }
+
+def test_two_users_same_challenge():
+    """두 사용자의 기록을 번갈아 반영해도 순위가 전체 재계산 결과와 같고, 챌린지 행을 먼저 잠그는지"""
+    (first, second), challenge_id = _setup()
+
+    statements = []
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()).upper())
+
+    now = datetime.utcnow()
+    runs = [(second, 3.0), (first, 2.0), (first, 4.0), (second, 3.0), (second, 5.0), (first, 6.0)]
+    try:
+        for user_id, distance in runs:
+            db = SessionLocal()
+            try:
+                statements.clear()
+                increment_challenge_progress(user_id, db, now, distance, distance * 360)
+                db.commit()
+
+                # 잠금 순서: 챌린지 행 SELECT가 참가자 UPDATE보다 먼저 실행됩니다.
+                lock_at = next(i for i, s in enumerate(statements) if s.startswith("SELECT CHALLENGES.ID") and s.endswith("ORDER BY CHALLENGES.ID"))
+                update_at = next(i for i, s in enumerate(statements) if s.startswith("UPDATE CHALLENGE_PARTICIPANTS"))
+                assert lock_at < update_at, "챌린지 행을 잠그기 전에 참가자 행을 갱신했습니다"
+
+                incremental = _ranks(db, challenge_id)
+                rebuild_challenge_ranks(db, [challenge_id])
+                rebuilt = _ranks(db, challenge_id)
+                db.rollback()
+                assert incremental == rebuilt, f"순위 불일치: {incremental} != {rebuilt}"
+            finally:
+                db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    db = SessionLocal()
+    try:
+        final = _ranks(db, challenge_id)
+    finally:
+        db.close()
+    assert final[first] == (1, 12.0) and final[second] == (2, 11.0), final
+    print("✅ 두 사용자 챌린지 순위 테스트 통과!")
+
+if __name__ == "__main__":
+    try:
+        test_two_users_same_challenge()
+    finally:
+        engine.dispose()
+        if os.path.exists(DB_PATH):
+            os.remove(DB_PATH)
@@ -0,0 +1,84 @@
+"""닉네임 검색 테스트 (3글자 미만 검색어의 부분 일치 포함)
+
+실제 DB 대신 임시 SQLite 파일을 사용합니다. PostgreSQL용 쿼리(_search_postgresql)도
+strpos 함수를 등록해 SQLite에서 실행하고 메모리 색인과 순서를 비교합니다.
+    python test_user_search.py
+"""
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "twieo_test_user_search.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import event
+
+import models
+from database import engine, SessionLocal
+from services import user_search
+from services.user_search import search_user_ids, UsernameIndex
+
+USERNAMES = ["me", "bob", "olga", "oscar", "o", "robo", "김철수", "철수", "박철수맨", "철수123", "영희"]
+
+@event.listens_for(engine, "connect")
+def _register_strpos(dbapi_connection, connection_record):
+    # PostgreSQL strpos(문자열, 찾을 값): 1부터 시작하는 위치, 없으면 0
+    dbapi_connection.create_function("strpos", 2, lambda text, sub: text.find(sub) + 1)
+
+def _setup():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add_all([
+            models.User(email=f"user{i}@test.com", username=username, hashed_password="x")
+            for i, username in enumerate(USERNAMES)
+        ])
+        db.commit()
+        return {user.username: user.id for user in db.query(models.User)}
+    finally:
+        db.close()
+
+def test_short_query_search():
+    """1~2글자 검색어도 접두어 일치 뒤에 부분 일치를 찾고, 두 검색 경로의 순서가 같은지"""
+    ids = _setup()
+    names = {user_id: username for username, user_id in ids.items()}
+    me = ids["me"]
+    user_search.username_index = UsernameIndex()
+
+    db = SessionLocal()
+    try:
+        expected = {
+            "o": ["o", "olga", "oscar", "bob", "robo"],
+            "철수": ["철수", "철수123", "김철수", "박철수맨"],
+            "bo": ["bob", "robo"],
+            "rob": ["robo"],
+        }
+        for query, usernames in expected.items():
+            found = [names[user_id] for user_id in search_user_ids(db, query, me, limit=20)]
+            assert found == usernames, f"{query}: {found} != {usernames}"
+            postgresql_path = [names[user_id] for user_id in user_search._search_postgresql(db, query, me, 20, 0)]
+            assert postgresql_path == usernames, f"{query} (PostgreSQL 쿼리): {postgresql_path} != {usernames}"
+
+        # 페이지 나누기: 접두어 일치와 부분 일치 경계를 넘는 offset
+        page = [names[user_id] for user_id in user_search._search_postgresql(db, "o", me, 2, 2)]
+        assert page == ["oscar", "bob"], page
+
+        # 짧은 검색어의 부분 일치 후보는 SHORT_QUERY_MATCH_LIMIT개까지만 읽습니다.
+        match_limit = user_search.SHORT_QUERY_MATCH_LIMIT
+        user_search.SHORT_QUERY_MATCH_LIMIT = 1
+        try:
+            capped = [names[user_id] for user_id in user_search._search_postgresql(db, "철수", me, 20, 0)]
+        finally:
+            user_search.SHORT_QUERY_MATCH_LIMIT = match_limit
+        assert capped[:2] == ["철수", "철수123"] and len(capped) == 3, capped
+    finally:
+        db.close()
+    print("✅ 짧은 검색어 닉네임 검색 테스트 통과!")
+
+if __name__ == "__main__":
+    try:
+        test_short_query_search()
+    finally:
+        engine.dispose()
+        if os.path.exists(DB_PATH):
+            os.remove(DB_PATH)